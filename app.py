@@ -1,16 +1,130 @@
+import os
+from datetime import date
+
 import streamlit as st
-import pandas as pd
 
 from utils.visualizations import plot_wind_speed_distribution, plot_wind_speed_over_time, get_wind_speed_stats, count_wind_speed_thresholds, wind_speed_seasonality 
 from utils.visualizations import plot_weibull_fit, plot_weibull_qq
 from src.data_fetcher import get_wind_data
-from src.model_wind import fit_weibull_distribution, calculate_exceedance_probability
-from src.pricer import calculate_premium
+from src.area import GRID_STEP, area_cells, get_area_wind_data, parse_polygon
+from src.model_wind import data_hash, get_weibull_model
+from src.pricer import calculate_premium, calculate_premium_from_model
+from src.bootstrap import bootstrap_premium
+from src.weibull_grid import DEFAULT_GRID_PATH, MAX_LOOKUP_DISTANCE_KM, WeibullGrid
+from src.backtest import CONTRACT_DAYS, burn_cost_table
+from src.geocoding import GeocodingCache
+from src.fit_store import FitStore
+from src.scheduler import WatchlistScheduler, read_watchlist
+from src.wind_series import WindSeries
+from src.lazy_imports import lazy_import, preload_in_background
+from src import metrics
+
+# pandas n'est utilisé ici que pour le panneau de diagnostics
+pd = lazy_import("pandas")
+
+# Site et période proposés par défaut
+DEFAULT_LOCATION = (44.2971, 0.1178)
+DEFAULT_START_DATE = date(2022, 1, 1)
+DEFAULT_END_DATE = date(2025, 12, 31)
 
 
 # Configuration de la page Streamlit
 st.set_page_config(page_title="Wind Risk Pricer",page_icon="🌪️",layout= "wide")
 
+
+def _warm_default_site():
+    # Calibre le site par défaut à partir du cache disque uniquement (pas d'appel réseau au démarrage)
+    from src.data_fetcher import get_store
+
+    latitude, longitude = DEFAULT_LOCATION
+    start_date, end_date = DEFAULT_START_DATE.isoformat(), DEFAULT_END_DATE.isoformat()
+    store = get_store()
+    if not store.missing_ranges(latitude, longitude, start_date, end_date):
+        get_weibull_model(WindSeries.from_frame(store.read(latitude, longitude, start_date, end_date)))
+
+
+# Imports lourds et préchauffage lancés en arrière-plan, une fois par processus :
+# la page s'affiche sans attendre scipy, pandas, pyarrow et plotly
+@st.cache_resource
+def start_background_warm_up():
+    return preload_in_background(
+        ["pandas", "scipy.stats", "pyarrow.parquet", "plotly.graph_objects"],
+        tasks=[_warm_default_site]
+    )
+
+
+start_background_warm_up()
+
+
+# Cache de géocodage (SQLite) et gazetier local, partagés par toutes les sessions
+@st.cache_resource
+def load_geocoding_cache():
+    return GeocodingCache()
+
+
+# Grille précalculée des paramètres de Weibull, chargée une seule fois par processus
+@st.cache_resource
+def load_weibull_grid(path):
+    return WeibullGrid(path)
+
+
+# Calibrages précalculés par le planificateur de la liste de suivi (relus quand le fichier change)
+@st.cache_resource
+def load_fit_store():
+    return FitStore()
+
+
+# Planificateur lancé dans l'application si une liste de suivi est configurée (WIND_WATCHLIST)
+@st.cache_resource
+def start_watchlist_scheduler():
+    watchlist_path = os.environ.get("WIND_WATCHLIST")
+    if not watchlist_path or not os.path.exists(watchlist_path):
+        return None
+    return WatchlistScheduler(read_watchlist(watchlist_path), fit_store=load_fit_store()).start()
+
+
+start_watchlist_scheduler()
+
+
+# ===============================================================
+# Étapes du calcul, chacune mise en cache selon ses seules entrées :
+# téléchargement -> nettoyage et calibration -> tarification -> graphiques.
+# La calibration est mise en cache par get_weibull_model (empreinte des données)
+# et la tarification, peu coûteuse, est refaite à chaque fois.
+# ===============================================================
+# cache_resource (et non cache_data) : le même objet est remis à toutes les sessions, sans copie.
+# Contrat : les appelants ne modifient jamais la série reçue ; WindSeries l'impose (tableaux en
+# lecture seule, attributs figés) et les fonctions d'analyse ne modifient pas leurs entrées.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def load_wind_data(latitude, longitude, start_date, end_date, radius_km=None, polygon=None):
+    # Le cache disque ne télécharge que les dates manquantes
+    if radius_km is not None or polygon is not None:
+        # Zone : maximum journalier sur les cellules de la grille qui la couvrent
+        cells = area_cells(latitude, longitude, radius_km=radius_km, polygon=polygon)
+        return get_area_wind_data(cells, start_date, end_date)
+    return WindSeries.from_frame(get_wind_data(latitude, longitude, start_date, end_date))
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def build_data_figures(data_key, _df):
+    # Graphiques d'analyse, construits une seule fois par jeu de données (sans modifier les données)
+    return {
+        "stats": get_wind_speed_stats(_df),
+        "distribution": plot_wind_speed_distribution(_df),
+        "trend": plot_wind_speed_over_time(_df),
+        "seasonality": wind_speed_seasonality(_df)
+    }
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def build_model_figures(data_key, _df, _model):
+    # Graphiques de validation, construits une seule fois par jeu de données
+    return {
+        "fit": plot_weibull_fit(_df, model=_model),
+        "qq": plot_weibull_qq(_df, model=_model)
+    }
+
+
 # Titre de l'application
 st.title("Wind Risk Pricer 🌪️")
 st.info("Cette application permet d'analyser les données de vent, de calibrer un modèle de Weibull, de calculer la probabilité de dépassement d'un seuil de vent et de calculer la prime d'assurance correspondante.")
@@ -41,21 +155,35 @@ if location_mode == "🔍 Recherche par nom":
         help="Entrez le nom d'une ville, région ou pays"
     )
     
+    geocoding_cache = load_geocoding_cache()
+
+    # Suggestions issues du gazetier local (sans appel réseau)
+    suggestions = geocoding_cache.suggest(location_name)
+    if suggestions:
+        suggestion = st.sidebar.selectbox(
+            "Suggestions",
+            options=[None] + suggestions,
+            format_func=lambda s: "—" if s is None else s["label"],
+            help="Villes du gazetier local correspondant à la saisie"
+        )
+        if suggestion is not None:
+            st.session_state.latitude = suggestion["latitude"]
+            st.session_state.longitude = suggestion["longitude"]
+            st.session_state.location_found = True
+
     # Bouton de géocodage
     if st.sidebar.button("🔍 Localiser", key="geocode_btn"):
         try:
-            from geopy.geocoders import Nominatim
-            
-            # Géocodage
-            geolocator = Nominatim(user_agent="wind_risk_pricer")
-            location = geolocator.geocode(location_name)
+            # Géocodage : cache et gazetier local d'abord, Nominatim en dernier recours
+            with metrics.span("geocoding", query=location_name):
+                location = geocoding_cache.geocode(location_name)
             
             if location:
                 # Stocker dans session_state pour persistance
-                st.session_state.latitude = location.latitude
-                st.session_state.longitude = location.longitude
+                st.session_state.latitude = location["latitude"]
+                st.session_state.longitude = location["longitude"]
                 st.session_state.location_found = True
-                st.sidebar.success(f"✅ Trouvé : {location.address}")
+                st.sidebar.success(f"✅ Trouvé : {location['address']}")
             else:
                 st.sidebar.error("❌ Lieu introuvable. Essayez un autre nom.")
                 st.session_state.location_found = False
@@ -70,14 +198,13 @@ if location_mode == "🔍 Recherche par nom":
         longitude = st.session_state.longitude
     else:
         # Valeurs par défaut si pas encore géocodé
-        latitude = 44.2971
-        longitude = 0.1178
+        latitude, longitude = DEFAULT_LOCATION
 
 else:
     # Mode coordonnées GPS
     latitude = st.sidebar.number_input(
         "Latitude",
-        value=st.session_state.get('latitude', 44.2971),
+        value=st.session_state.get('latitude', DEFAULT_LOCATION[0]),
         min_value=-90.0,
         max_value=90.0,
         format="%.4f",
@@ -86,7 +213,7 @@ else:
 
     longitude = st.sidebar.number_input(
         "Longitude", 
-        value=st.session_state.get('longitude', 0.1178),
+        value=st.session_state.get('longitude', DEFAULT_LOCATION[1]),
         min_value=-180.0,
         max_value=180.0,
         format="%.4f",
@@ -98,6 +225,35 @@ else:
     st.session_state.latitude = latitude
     st.session_state.longitude = longitude
 
+# Zone couverte : le point seul, ou le pire vent journalier sur un rayon ou un polygone
+area_mode = st.sidebar.radio(
+    "Zone couverte",
+    options=["Point", "Rayon", "Polygone"],
+    horizontal=True,
+    help="Pour un site étendu, la prime porte sur le vent maximal de toutes les cellules de la zone"
+)
+area = {}
+cells = None
+if area_mode == "Rayon":
+    area["radius_km"] = st.sidebar.number_input("Rayon (km)", value=10.0, min_value=1.0, max_value=100.0, step=1.0)
+elif area_mode == "Polygone":
+    polygon_text = st.sidebar.text_area(
+        "Sommets (une ligne « latitude, longitude » par sommet)",
+        value=f"{latitude - 0.1:.4f}, {longitude - 0.1:.4f}\n{latitude - 0.1:.4f}, {longitude + 0.1:.4f}\n"
+              f"{latitude + 0.1:.4f}, {longitude:.4f}"
+    )
+    try:
+        area["polygon"] = parse_polygon(polygon_text)
+    except ValueError as e:
+        st.sidebar.error(f"❌ Polygone invalide : {e}")
+if area:
+    try:
+        cells = area_cells(latitude, longitude, **area)
+        st.sidebar.info(f"🗺️ {len(cells)} cellules de {GRID_STEP}° couvertes")
+    except ValueError as e:
+        st.sidebar.error(f"❌ {e}")
+        area = {}
+
 # Après la sélection de localisation
 if st.sidebar.checkbox("📍 Afficher sur la carte"):
     import folium
@@ -105,11 +261,23 @@ if st.sidebar.checkbox("📍 Afficher sur la carte"):
     
     m = folium.Map(location=[latitude, longitude], zoom_start=10)
     folium.Marker([latitude, longitude], popup="Localisation sélectionnée").add_to(m)
+    if "radius_km" in area:
+        folium.Circle([latitude, longitude], radius=area["radius_km"] * 1000, fill=False).add_to(m)
+    if "polygon" in area:
+        folium.Polygon(area["polygon"], fill=False).add_to(m)
+    if cells is not None:
+        # Cellules de la grille dont le vent est agrégé
+        half_step = GRID_STEP / 2
+        for cell in cells.itertuples():
+            folium.Rectangle(
+                [[cell.latitude - half_step, cell.longitude - half_step], [cell.latitude + half_step, cell.longitude + half_step]],
+                color="orange", weight=1, fill=True, fill_opacity=0.15, tooltip=cell.site_id
+            ).add_to(m)
     folium_static(m, width=800, height=400)
 
 st.sidebar.subheader("📅 Période d'analyse")
-start_date = st.sidebar.date_input("Date de début", value=pd.to_datetime("2022-01-01"))
-end_date = st.sidebar.date_input("Date de fin", value=pd.to_datetime("2025-12-31"))
+start_date = st.sidebar.date_input("Date de début", value=DEFAULT_START_DATE)
+end_date = st.sidebar.date_input("Date de fin", value=DEFAULT_END_DATE)
 
 st.sidebar.subheader("Paramètres de calcul de la prime")
 
@@ -135,6 +303,20 @@ loading_factor = st.sidebar.slider(
         help="Marge de sécurité pour la prime finale (ex: 1.2 pour une prime finale égale à 120% de la prime calculée)"
     )
 
+# Devis indicatif instantané à partir de la grille précalculée (le calcul complet reste sur le bouton)
+if not area and os.path.exists(DEFAULT_GRID_PATH):
+    grid_params = load_weibull_grid(DEFAULT_GRID_PATH).lookup(latitude, longitude)
+    if grid_params is not None and grid_params[2] <= MAX_LOOKUP_DISTANCE_KM:
+        grid_shape, grid_scale, _ = grid_params
+        indicative_df = calculate_premium(grid_shape, grid_scale, threshold, exposure, confidence_level=1/loading_factor)
+        st.sidebar.info(f"💡 Prime indicative (grille) : {indicative_df['Prime totale'].iloc[0]:.2f} €")
+
+bootstrap_enabled = st.sidebar.checkbox(
+        "Intervalles de confiance (bootstrap)",
+        value=False,
+        help="Rééchantillonne l'historique par blocs de 30 jours et recalibre le modèle pour mesurer l'incertitude sur les paramètres et la prime"
+    )
+
 calculate_button = st.sidebar.button(
     "Calculer la prime",
     type="primary",
@@ -149,23 +331,42 @@ if calculate_button:
     with st.spinner("Chargement des données et calibration du modèle"):
 
         # Récupération des données de vent
-        df = get_wind_data(latitude, longitude, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
-        st.success("✅ Données de vent récupérées avec succès !")
-
-        # Calibration du modèle 
-        shape, loc, scale = fit_weibull_distribution(df)
+        inputs = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "start_date": start_date.strftime("%Y-%m-%d"),
+            "end_date": end_date.strftime("%Y-%m-%d"),
+            **area
+        }
+        df = load_wind_data(**inputs)
+        if cells is not None:
+            st.success(f"✅ Données de vent récupérées avec succès (maximum journalier sur {len(cells)} cellules) !")
+        else:
+            st.success("✅ Données de vent récupérées avec succès !")
+
+        # Calibration du modèle (une seule fois, réutilisé par les graphiques de validation),
+        # évitée si le planificateur a déjà calibré ces données
+        model = get_weibull_model(df, lookup=load_fit_store().params)
+        shape, loc, scale = model.params
         st.success(f"✅ Modèle de Weibull calibré : shape(k)={shape:.2f}, scale(λ)={scale:.2f}")
 
         # Calcul de la prime d'assurance
-        premium_df = calculate_premium(shape, scale, threshold, exposure, confidence_level=1/loading_factor)
+        premium_df = calculate_premium_from_model(model, threshold, exposure, confidence_level=1/loading_factor)
         premium = premium_df["Prime totale"].iloc[0]
         st.success(f"✅ Prime d'assurance calculée : {premium:.2f} €")
 
         st.write(" Détails du calcul de la prime d'assurance")
         st.write(premium_df)
 
-        # Stockage dans les session_state pour éviter de recalculer à chaque interaction
-        st.session_state.df = df
+        # Incertitude sur les paramètres (bootstrap)
+        if bootstrap_enabled:
+            intervals_df = bootstrap_premium(df, threshold, exposure, confidence_level=1/loading_factor,
+                                             n_boot=1000, block_length=30)
+            st.write(" Intervalles de confiance à 90 % (bootstrap, 1000 réplications)")
+            st.write(intervals_df)
+
+        # Stockage des paramètres dans les session_state : les étapes en cache sont rejouées à chaque interaction
+        st.session_state.inputs = inputs
         st.session_state.shape = shape
         st.session_state.loc = loc
         st.session_state.scale = scale
@@ -179,6 +380,11 @@ if calculate_button:
 # Affichachage des résultats
 if st.session_state.get('calculation_done', False):
 
+    # Données et modèle récupérés depuis les caches (aucun téléchargement ni calibration à refaire)
+    df = load_wind_data(**st.session_state.inputs)
+    model = get_weibull_model(df, lookup=load_fit_store().params)
+    data_key = data_hash(df)
+
     # Je crée deux onglets pour séparer les analyses et validation de modèle du calcul de la prime
     tab1, tab2 = st.tabs(["📊 Analyse des données ", "✅ Validation du modèle"])
 
@@ -190,26 +396,35 @@ if st.session_state.get('calculation_done', False):
 
         # Statistiques descriptives des vitesses de vent
         st.markdown(" Statistiques descriptives des vitesses de vent")
-        wind_summary = get_wind_speed_stats(st.session_state.df)
+        data_figures = build_data_figures(data_key, df)
+        wind_summary = data_figures["stats"]
         st.write(wind_summary)
 
         # Visualisation de la distribution des vitesses de vent
-        fig_weibull_dist = plot_wind_speed_distribution(st.session_state.df)
+        fig_weibull_dist = data_figures["distribution"]
         st.plotly_chart(fig_weibull_dist, use_container_width=True)
 
         # Trend des vitesses de vent dans le temps
-        fig_trend = plot_wind_speed_over_time(st.session_state.df)
+        fig_trend = data_figures["trend"]
         st.plotly_chart(fig_trend, use_container_width=True)
 
         # Saisonnalité des vitesses de vent
-        fig_seasonality = wind_speed_seasonality(st.session_state.df)
+        fig_seasonality = data_figures["seasonality"]
         st.plotly_chart(fig_seasonality, use_container_width=True)
 
         # Dépassement de seuils de vent
 
         st.subheader(f"Nombre de jours avec une vitesse de vent maximale dépassant {st.session_state.threshold} km/h")
-        threshold_count = count_wind_speed_thresholds(st.session_state.df, st.session_state.threshold)
+        threshold_count = count_wind_speed_thresholds(df, st.session_state.threshold)
         st.info(f"Sur la période analysée, le seuil a été franchi {threshold_count} fois.")
+
+        # Burn cost historique : le contrat rejoué sur toutes les fenêtres d'un an de l'historique
+        if len(df) >= CONTRACT_DAYS:
+            st.subheader("Burn cost historique (contrats d'un an glissants)")
+            burn_cost_df = burn_cost_table(df, [st.session_state.threshold], st.session_state.exposure,
+                                           shape=st.session_state.shape, scale=st.session_state.scale,
+                                           confidence_level=1/st.session_state.loading_factor)
+            st.write(burn_cost_df)
         
 
     
@@ -218,12 +433,30 @@ if st.session_state.get('calculation_done', False):
     # ==============================================================
     with tab2:
         st.header("✅ Validation du modèle")
+        model_figures = build_model_figures(data_key, df, model)
+
         # Visualisation de l'ajustement de la distribution de Weibull
-        fig_weibull_fit = plot_weibull_fit(st.session_state.df)
+        fig_weibull_fit = model_figures["fit"]
         st.plotly_chart(fig_weibull_fit, use_container_width=True)
 
         # Visualisation du Q-Q plot pour évaluer l'ajustement de la distribution de Weibull
-        fig_qq = plot_weibull_qq(st.session_state.df)
+        fig_qq = model_figures["qq"]
         st.plotly_chart(fig_qq, use_container_width=True)
 
-       
+
+# Fraîcheur des sites de la liste de suivi (si le planificateur a déjà tourné)
+if load_fit_store().sites():
+    with st.expander("🗓️ Liste de suivi", expanded=False):
+        st.write(load_fit_store().staleness())
+
+# ==============================================================
+# Diagnostics (si l'instrumentation est activée avec WIND_METRICS=1)
+# ==============================================================
+if metrics.is_enabled():
+    with st.expander("🩺 Diagnostics", expanded=False):
+        stage_stats = metrics.summary()
+        if stage_stats:
+            st.write(pd.DataFrame(stage_stats).T.sort_values("total_ms", ascending=False))
+        st.write(metrics.counters())
+        st.download_button("Exporter (Prometheus)", metrics.to_prometheus(), file_name="metrics.prom")
+        st.download_button("Exporter (JSON lines)", metrics.to_jsonl(), file_name="metrics.jsonl")
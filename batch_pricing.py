@@ -0,0 +1,185 @@
+"""
+Tarification en lot d'un portefeuille de sites, sans passer par Streamlit.
+
+Exemple :
+    python batch_pricing.py sites.csv --output primes.csv
+
+Le fichier d'entrée (CSV ou Parquet) contient les colonnes site_id, latitude, longitude,
+start_date, end_date, threshold, exposure et optionnellement loading_factor.
+Avec --select-model, plusieurs familles de lois sont calibrées par site (Weibull, lognormale,
+Gumbel/GEV des maxima annuels et mensuels) et la meilleure selon le critère choisi sert au calcul.
+Les résultats sont ajoutés au fichier de sortie au fur et à mesure : relancer la même
+commande après une interruption reprend là où le traitement s'était arrêté.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.data_fetcher import fetch_wind_data_bulk
+from src.distributions import DEFAULT_FAMILIES, PARAM_COLUMNS, SELECTION_CRITERIA, fit_distributions, select_best_models
+from src.model_wind import fit_weibull_batch
+from src.pricer import price_best_models, price_portfolio
+
+REQUIRED_COLUMNS = ["site_id", "latitude", "longitude", "start_date", "end_date", "threshold", "exposure"]
+DEFAULT_LOADING_FACTOR = 1.2
+
+
+def read_sites(path):
+    """
+    Lit le fichier des sites à tarifer (CSV ou Parquet)
+    """
+    sites = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+    missing = [col for col in REQUIRED_COLUMNS if col not in sites.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {path} : {missing}")
+
+    if "loading_factor" not in sites.columns:
+        sites["loading_factor"] = DEFAULT_LOADING_FACTOR
+    for col in ["start_date", "end_date"]:
+        sites[col] = pd.to_datetime(sites[col]).dt.strftime("%Y-%m-%d")
+    sites["site_id"] = sites["site_id"].astype(str)
+    return sites
+
+
+def done_site_ids(output_path):
+    """
+    Sites déjà présents dans le fichier de résultats (reprise après interruption)
+    """
+    if not os.path.exists(output_path):
+        return set()
+    return set(pd.read_csv(output_path, usecols=["site_id"], dtype={"site_id": str})["site_id"])
+
+
+def _init_worker():
+    # scipy est importé au démarrage du processus, pendant le téléchargement du premier paquet :
+    # sinon son import tomberait dans la mesure de la calibration ou de la tarification du premier paquet
+    for name in ["scipy.stats", "scipy.special"]:
+        importlib.import_module(name)
+
+
+def fit_and_price(sites, series, criterion=None):
+    """
+    Calibre et tarifie un paquet de sites (exécuté dans un processus du pool).
+    `series` contient un couple (dates, vitesses) par site ; si `criterion` est renseigné,
+    la meilleure famille de lois de chaque site est retenue selon ce critère.
+    """
+    if criterion:
+        return fit_and_price_best_models(sites, series, criterion)
+
+    t0 = time.perf_counter()
+    series = [wind_speeds for _, wind_speeds in series]
+    shapes, scales = fit_weibull_batch(series)
+    t_fit = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results_df = price_portfolio(shape=shapes, scale=scales, threshold=sites["threshold"].to_numpy(),
+                                 exposure=sites["exposure"].to_numpy(),
+                                 loading_factor=sites["loading_factor"].to_numpy())
+    results_df.insert(0, "site_id", sites["site_id"].to_numpy())
+    results_df.insert(1, "shape", shapes)
+    results_df.insert(2, "scale", scales)
+    results_df.insert(3, "Nombre de jours", [int(np.sum(~np.isnan(x))) for x in series])
+    t_price = time.perf_counter() - t0
+    return results_df, t_fit, t_price
+
+
+def fit_and_price_best_models(sites, series, criterion):
+    t0 = time.perf_counter()
+    # Déjà dans un processus du pool : les familles sont calibrées ici, sans sous-pool
+    fits = fit_distributions(dict(zip(sites["site_id"], series)), DEFAULT_FAMILIES, max_workers=1)
+    best = select_best_models(fits, criterion).set_index("site_id").reindex(sites["site_id"])
+    t_fit = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    results_df = price_best_models(best, threshold=sites["threshold"].to_numpy(), exposure=sites["exposure"].to_numpy(),
+                                   loading_factor=sites["loading_factor"].to_numpy())
+    results_df.insert(0, "site_id", sites["site_id"].to_numpy())
+    results_df.insert(1, "Loi", best["family"].to_numpy())
+    for i, col in enumerate(PARAM_COLUMNS):
+        results_df.insert(2 + i, col, best[col].to_numpy())
+    results_df.insert(2 + len(PARAM_COLUMNS), criterion.upper(), best[criterion].to_numpy())
+    results_df.insert(3 + len(PARAM_COLUMNS), "Nombre de jours", best["n_days"].to_numpy())
+    results_df = results_df.reset_index(drop=True)
+    t_price = time.perf_counter() - t0
+    return results_df, t_fit, t_price
+
+
+def run(input_path, output_path, chunk_size=500, max_workers=None, criterion=None):
+    timings = {"Téléchargement": 0.0, "Calibration": 0.0, "Tarification": 0.0, "Écriture": 0.0}
+    t_start = time.perf_counter()
+
+    sites = read_sites(input_path)
+    done = done_site_ids(output_path)
+    todo = sites[~sites["site_id"].isin(done)].reset_index(drop=True)
+    print(f"{len(sites)} sites, {len(done)} déjà tarifés, {len(todo)} à traiter")
+
+    n_priced = n_failed = 0
+    pending = []
+
+    def write_completed(block):
+        nonlocal n_priced
+        for future in [f for f in pending if block or f.done()]:
+            results_df, t_fit, t_price = future.result()
+            t0 = time.perf_counter()
+            results_df.to_csv(output_path, mode="a", header=not os.path.exists(output_path), index=False)
+            timings["Écriture"] += time.perf_counter() - t0
+            timings["Calibration"] += t_fit
+            timings["Tarification"] += t_price
+            n_priced += len(results_df)
+            pending.remove(future)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        for start in range(0, len(todo), chunk_size):
+            chunk = todo.iloc[start:start + chunk_size]
+
+            # 1. Téléchargement (via le cache disque, requêtes en parallèle)
+            t0 = time.perf_counter()
+            series = {}
+            for result in fetch_wind_data_bulk(chunk[["site_id", "latitude", "longitude", "start_date", "end_date"]]):
+                if result.error is not None:
+                    n_failed += 1
+                    print(f"Site {result.site_id} en échec : {result.error}", file=sys.stderr)
+                else:
+                    series[result.site_id] = (result.data["date"].to_numpy(), result.data["wind_speed_max"].to_numpy(dtype=float))
+            timings["Téléchargement"] += time.perf_counter() - t0
+
+            # 2. Calibration et tarification dans le pool pendant le téléchargement du paquet suivant
+            chunk = chunk[chunk["site_id"].isin(series.keys())]
+            if len(chunk):
+                pending.append(executor.submit(fit_and_price, chunk, [series[site_id] for site_id in chunk["site_id"]], criterion))
+            write_completed(block=False)
+
+        write_completed(block=True)
+
+    elapsed = time.perf_counter() - t_start
+    print(f"{n_priced} sites tarifés, {n_failed} en échec, en {elapsed:.1f} s "
+          f"({n_priced / elapsed if elapsed else 0:.1f} sites/s)")
+    for stage, duration in timings.items():
+        print(f"  {stage:<15} {duration:8.2f} s")
+    return n_failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tarification en lot d'un portefeuille de sites")
+    parser.add_argument("input", help="Fichier des sites (CSV ou Parquet)")
+    parser.add_argument("--output", "-o", required=True, help="Fichier CSV des résultats (complété au fur et à mesure)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Nombre de sites par paquet")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus pour la calibration")
+    parser.add_argument("--select-model", choices=SELECTION_CRITERIA, default=None,
+                        help="Choisit la meilleure loi de chaque site selon ce critère (par défaut : Weibull)")
+    args = parser.parse_args(argv)
+
+    n_failed = run(args.input, args.output, chunk_size=args.chunk_size, max_workers=args.workers,
+                   criterion=args.select_model)
+    return 1 if n_failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+"""
+Test de charge du service de cotation (quote_api.py) contre le faux serveur Open-Meteo local.
+
+Exemples :
+    python -m benchmarks.load_test                                  # 20 sites, 2000 cotations, 16 clients
+    python -m benchmarks.load_test --sites 100 --requests 5000 --concurrency 32 --processes 2
+    python -m benchmarks.load_test --batch-size 50                  # cotations par lots de 50
+
+Deux phases sont mesurées : « froid » (première cotation de chaque site : téléchargement et
+calibrage) puis « chaud » (modèles en mémoire). Les latences p50/p90/p99 et le débit sont
+affichés et écrits dans benchmarks/load_test_results.json.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.open_meteo_stub import start_stub_server
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "load_test_results.json")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _sites(n_sites, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(round(float(lat), 4), round(float(lon), 4))
+            for lat, lon in zip(rng.uniform(42.0, 51.0, n_sites), rng.uniform(-4.5, 8.0, n_sites))]
+
+
+def _quote(site, rng):
+    return {
+        "latitude": site[0],
+        "longitude": site[1],
+        "threshold": float(rng.choice([35.0, 45.0, 55.0])),
+        "exposure": float(rng.uniform(1e5, 1e6)),
+        "start_date": "1995-01-01",
+        "end_date": "2024-12-31"
+    }
+
+
+def start_service(port, archive_url, workers, processes):
+    """
+    Lance quote_api.py dans un sous-processus et attend qu'il réponde sur /health
+    """
+    env = dict(os.environ, OPEN_METEO_ARCHIVE_URL=archive_url, WIND_CACHE_DIR=tempfile.mkdtemp())
+    process = subprocess.Popen(
+        [sys.executable, "quote_api.py", "--port", str(port), "--workers", str(workers), "--processes", str(processes)],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health")
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Le service de cotation n'a pas démarré")
+
+
+def run_phase(port, payloads, concurrency):
+    """
+    Envoie les requêtes avec `concurrency` clients (une connexion keep-alive chacun)
+    et retourne les latences (ms), le nombre d'erreurs et la durée totale (s)
+    """
+    latencies = np.full(len(payloads), np.nan)
+    errors = []
+    cursor = iter(range(len(payloads)))
+    lock = threading.Lock()
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        while True:
+            with lock:
+                i = next(cursor, None)
+            if i is None:
+                break
+            # En octets : http.client envoie alors en-têtes et corps en un seul paquet
+            body = json.dumps(payloads[i]).encode()
+            t0 = time.perf_counter()
+            try:
+                connection.request("POST", "/quote", body=body, headers={"Content-Type": "application/json"})
+                response = connection.getresponse()
+                data = json.loads(response.read())
+            except (OSError, http.client.HTTPException, ValueError):
+                # Connexion refusée ou coupée : comptée comme erreur, nouvelle connexion
+                errors.append(i)
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+                continue
+            latencies[i] = 1000 * (time.perf_counter() - t0)
+            results = data["quotes"] if "quotes" in data else [data]
+            if response.status != 200 or any("error" in r for r in results):
+                errors.append(i)
+        connection.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(min(concurrency, len(payloads)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, len(errors), time.perf_counter() - t0
+
+
+def summarize(name, latencies, n_errors, elapsed, quotes_per_request):
+    p50, p90, p99 = np.nanpercentile(latencies, [50, 90, 99])
+    return {
+        "phase": name,
+        "requests": len(latencies),
+        "quotes": len(latencies) * quotes_per_request,
+        "errors": n_errors,
+        "p50_ms": round(float(p50), 2),
+        "p90_ms": round(float(p90), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(np.nanmax(latencies)), 2),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+        "quotes_per_s": round(len(latencies) * quotes_per_request / elapsed, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du service de cotation")
+    parser.add_argument("--sites", type=int, default=20, help="Nombre de sites distincts")
+    parser.add_argument("--requests", type=int, default=2000, help="Nombre de requêtes de la phase « chaud »")
+    parser.add_argument("--concurrency", type=int, default=16, help="Nombre de clients simultanés")
+    parser.add_argument("--batch-size", type=int, default=1, help="Cotations par requête")
+    parser.add_argument("--workers", type=int, default=8, help="Workers du service")
+    parser.add_argument("--processes", type=int, default=1, help="Processus du service")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+
+    stub, archive_url = start_stub_server()
+    port = _free_port()
+    service = start_service(port, archive_url, args.workers, args.processes)
+    rng = np.random.default_rng(0)
+    sites = _sites(args.sites)
+
+    def payload(site_list):
+        quotes = [_quote(site, rng) for site in site_list]
+        return quotes[0] if len(quotes) == 1 else {"quotes": quotes}
+
+    try:
+        # Phase froide : chaque site une fois (téléchargement, cache disque et calibrage)
+        cold = [payload([site]) for site in sites]
+        phases = [summarize("froid", *run_phase(port, cold, args.concurrency), 1)]
+
+        # Phase chaude : sites tirés au hasard, modèles déjà en mémoire
+        warm = [payload([sites[j] for j in rng.integers(0, len(sites), args.batch_size)]) for _ in range(args.requests)]
+        phases.append(summarize("chaud", *run_phase(port, warm, args.concurrency), args.batch_size))
+    finally:
+        service.terminate()
+        service.wait()
+        stub.shutdown()
+
+    print(f"{'phase':<8} {'requêtes':>9} {'erreurs':>8} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'cotations/s':>12}")
+    for phase in phases:
+        print(f"{phase['phase']:<8} {phase['requests']:>9} {phase['errors']:>8} {phase['p50_ms']:>9.2f} "
+              f"{phase['p90_ms']:>9.2f} {phase['p99_ms']:>9.2f} {phase['quotes_per_s']:>12.1f}")
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "config": vars(args),
+            "phases": phases
+        }, f, indent=2)
+    print(f"Résultats : {args.output}")
+    return 1 if any(phase["errors"] for phase in phases) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
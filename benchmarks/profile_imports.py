@@ -0,0 +1,87 @@
+"""
+Profil des imports au démarrage de l'application (python -X importtime).
+
+Exemples :
+    python -m benchmarks.profile_imports                   # imports de app.py, 25 modules les plus lents
+    python -m benchmarks.profile_imports --top 50 --output import_profile.json
+    python -m benchmarks.profile_imports --module scipy.stats
+
+Les imports de premier niveau de app.py sont rejoués dans un interpréteur neuf :
+le rapport donne le temps total et les modules les plus coûteux (temps cumulé, en ms).
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, "app.py")
+
+
+def app_imports(path=APP_PATH):
+    """
+    Instructions d'import de premier niveau d'un script (celles exécutées au démarrage)
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def profile_imports(statements):
+    """
+    Exécute les imports avec -X importtime et retourne [(module, propre_ms, cumulé_ms)] et le temps total (ms)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Échec des imports :\n{result.stderr[-2000:]}")
+
+    # Lignes "import time: self [us] | cumulative | imported package"
+    modules = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        modules.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+        # Les modules de premier niveau (indentation minimale) s'additionnent sans double compte
+        if depth == 1:
+            total_ms += int(cumulative_us) / 1000
+    return modules, total_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profil des imports au démarrage")
+    parser.add_argument("--module", action="append", help="Module à profiler (par défaut : imports de app.py)")
+    parser.add_argument("--top", type=int, default=25, help="Nombre de modules affichés")
+    parser.add_argument("--output", help="Rapport JSON (optionnel)")
+    args = parser.parse_args(argv)
+
+    statements = [f"import {name}" for name in args.module] if args.module else app_imports()
+    modules, total_ms = profile_imports(statements)
+    slowest = sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]
+
+    print(f"Imports : {total_ms:.0f} ms au total ({len(modules)} modules)")
+    print(f"{'module':<50} {'propre (ms)':>12} {'cumulé (ms)':>12}")
+    for name, self_ms, cumulative_ms in slowest:
+        print(f"{name:<50} {self_ms:>12.1f} {cumulative_ms:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "statements": statements,
+                "total_ms": total_ms,
+                "slowest": [{"module": name, "self_ms": s, "cumulative_ms": c} for name, s, c in slowest]
+            }, f, indent=2)
+        print(f"Rapport : {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Benchmarks du téléchargement, de la calibration, de la tarification et des graphiques.
+
+Exemples :
+    python -m benchmarks.run_benchmarks                      # mesure et compare à la référence
+    python -m benchmarks.run_benchmarks --save-baseline      # enregistre la référence
+    python -m benchmarks.run_benchmarks --record             # enregistre les réponses Open-Meteo réelles
+    python -m benchmarks.run_benchmarks --record-synthetic   # réponses synthétiques (sans réseau)
+
+Les réponses enregistrées dans benchmarks/fixtures/ sont utilisées si elles existent ; sinon les
+réponses sont générées par le faux serveur local (même format). Les fixtures synthétiques et la
+référence benchmarks/baseline.json sont versionnées : comparer sur une autre machine demande
+d'abord d'y enregistrer sa propre référence (--save-baseline).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, "fixtures")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results.json")
+
+LATITUDE, LONGITUDE = 44.2971, 0.1178
+
+# Tailles des séries : (nom, nombre d'années, fréquence)
+SERIES_SIZES = [("1an_jour", 1, "D"), ("4ans_jour", 4, "D"), ("30ans_jour", 30, "D"), ("30ans_heure", 30, "h")]
+# Nombre de sites pour la calibration par lots et la tarification
+SITE_COUNTS = [1, 100, 1000, 10000]
+
+# Écart relatif toléré par rapport à la référence avant de signaler une régression
+DEFAULT_TOLERANCE = 0.25
+# Écart absolu (s) en dessous duquel un ralentissement est attribué au bruit de mesure
+NOISE_FLOOR = 0.002
+
+
+def measure(fn, setup=None, repeat=5):
+    """
+    Exécute fn `repeat` fois (setup non chronométré) et renvoie les durées médiane et minimale
+    """
+    durations = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        durations.append(time.perf_counter() - t0)
+    return {"median": statistics.median(durations), "min": min(durations), "repeat": repeat}
+
+
+def synthetic_frame(years, freq, seed=0):
+    """
+    Série synthétique de vitesses de vent au format de get_wind_data
+    """
+    dates = pd.date_range("1990-01-01", periods=int(years * (365 if freq == "D" else 8760)), freq=freq)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": dates.strftime("%Y-%m-%d" if freq == "D" else "%Y-%m-%dT%H:%M"),
+        "wind_speed_max": np.round(22.0 * rng.weibull(2.2, size=len(dates)), 1)
+    })
+
+
+def fixture_path(years):
+    return os.path.join(FIXTURES_DIR, f"daily_{years}y.json")
+
+
+def record_fixtures(synthetic=False):
+    """
+    Enregistre des réponses de l'API Open-Meteo pour les benchmarks de parsing : réponses réelles,
+    ou générées par le faux serveur local (même format, reproductibles et sans réseau)
+    """
+    from src.data_fetcher import request_archive
+    from src.open_meteo_stub import synthetic_daily
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    end_year = date.today().year - 1
+    for _, years, freq in SERIES_SIZES:
+        if freq != "D":
+            continue
+        params = {
+            "latitude": LATITUDE,
+            "longitude": LONGITUDE,
+            "start_date": f"{end_year - years + 1}-01-01",
+            "end_date": f"{end_year}-12-31",
+            "daily": "wind_speed_10m_max",
+            "timezone": "auto"
+        }
+        if synthetic:
+            times, values = synthetic_daily(LATITUDE, LONGITUDE, params["start_date"], params["end_date"])
+            payload = {"latitude": LATITUDE, "longitude": LONGITUDE, "timezone": "auto",
+                       "daily_units": {"time": "iso8601", "wind_speed_10m_max": "km/h"},
+                       "daily": {"time": times, "wind_speed_10m_max": values}}
+        else:
+            payload = request_archive(params)
+        with open(fixture_path(years), "w") as f:
+            json.dump(payload, f)
+        print(f"Fixture enregistrée : {fixture_path(years)}")
+
+
+def bench_fetch(results, repeat):
+    from src import data_fetcher
+    from src.open_meteo_stub import start_stub_server, synthetic_daily
+
+    server, url = start_stub_server()
+    data_fetcher.ARCHIVE_URL = url
+    try:
+        for name, years, freq in SERIES_SIZES:
+            if freq != "D":
+                continue
+            start_date, end_date = f"{1995 - years}-01-01", "1994-12-31"
+
+            # Parsing seul, sur une réponse enregistrée si disponible
+            if os.path.exists(fixture_path(years)):
+                with open(fixture_path(years), "rb") as f:
+                    payload = f.read()
+            else:
+                times, values = synthetic_daily(LATITUDE, LONGITUDE, start_date, end_date)
+                payload = json.dumps({"daily": {"time": times, "wind_speed_10m_max": values}}).encode()
+            results[f"parse/{name}"] = measure(lambda: data_fetcher._daily_frame(json.loads(payload)), repeat=repeat)
+
+            # Requête complète sur le faux serveur local, sans puis avec le cache
+            results[f"get_wind_data/sans_cache/{name}"] = measure(
+                lambda: data_fetcher.get_wind_data(LATITUDE, LONGITUDE, start_date, end_date, use_cache=False), repeat=repeat)
+            data_fetcher.get_wind_data(LATITUDE, LONGITUDE, start_date, end_date)
+            results[f"get_wind_data/cache/{name}"] = measure(
+                lambda: data_fetcher.get_wind_data(LATITUDE, LONGITUDE, start_date, end_date), repeat=repeat)
+    finally:
+        server.shutdown()
+
+
+def bench_fit(results, repeat):
+    from src import model_wind
+
+    for name, years, freq in SERIES_SIZES:
+        df = synthetic_frame(years, freq)
+
+        # Vider le cache des modèles pour mesurer une vraie calibration
+        def setup():
+            model_wind._model_cache.clear()
+            return (df,)
+
+        results[f"fit_weibull_distribution/{name}"] = measure(model_wind.fit_weibull_distribution, setup=setup, repeat=repeat)
+
+    rng = np.random.default_rng(0)
+    for n_sites in SITE_COUNTS:
+        series = 22.0 * rng.weibull(2.2, size=(n_sites, 365))
+        results[f"fit_weibull_batch/{n_sites}_sites"] = measure(lambda: model_wind.fit_weibull_batch(series), repeat=repeat)
+
+
+def bench_pricing(results, repeat):
+    from src.pricer import calculate_premium, price_portfolio
+
+    results["calculate_premium/1_site"] = measure(lambda: calculate_premium(2.2, 22.0, 35.0, 1e6, 1 / 1.2), repeat=repeat)
+
+    rng = np.random.default_rng(0)
+    for n_sites in SITE_COUNTS:
+        sites = pd.DataFrame({
+            "shape": rng.uniform(1.5, 3.0, n_sites),
+            "scale": rng.uniform(15, 35, n_sites),
+            "threshold": 35.0,
+            "exposure": 1e6,
+            "loading_factor": 1.2
+        })
+        results[f"price_portfolio/{n_sites}_sites"] = measure(lambda: price_portfolio(sites), repeat=repeat)
+
+
+def bench_figures(results, repeat):
+    from utils import visualizations
+
+    builders = {
+        "plot_wind_speed_distribution": visualizations.plot_wind_speed_distribution,
+        "plot_wind_speed_over_time": visualizations.plot_wind_speed_over_time,
+        "get_wind_speed_stats": visualizations.get_wind_speed_stats,
+        "count_wind_speed_thresholds": lambda df: visualizations.count_wind_speed_thresholds(df, 35.0),
+        "wind_speed_seasonality": visualizations.wind_speed_seasonality,
+        "plot_weibull_fit": visualizations.plot_weibull_fit,
+        "plot_weibull_qq": visualizations.plot_weibull_qq,
+    }
+    for name, years, freq in SERIES_SIZES:
+        df = synthetic_frame(years, freq)
+        for builder_name, builder in builders.items():
+            results[f"figures/{builder_name}/{name}"] = measure(builder, setup=lambda: (df,), repeat=repeat)
+
+
+def compare(results, baseline, tolerance, noise_floor=NOISE_FLOOR):
+    """
+    Compare la durée minimale de chaque mesure à la médiane de la référence et renvoie la liste des
+    régressions : une vraie régression ralentit toutes les répétitions, alors qu'une seule répétition
+    ralentie par la charge de la machine ne déplace pas le minimum. Un écart de moins de noise_floor
+    secondes n'est pas signalé (bruit des mesures sub-milliseconde).
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"  {name:<60} {result['min'] * 1000:10.2f} ms   (nouveau)")
+            continue
+        ratio = result["min"] / reference["median"]
+        slower = ratio > 1 + tolerance and result["min"] - reference["median"] > noise_floor
+        flag = "  RÉGRESSION" if slower else ""
+        print(f"  {name:<60} {result['min'] * 1000:10.2f} ms   x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du Wind Risk Pricer")
+    parser.add_argument("--repeat", type=int, default=5, help="Nombre de répétitions par mesure")
+    parser.add_argument("--only", choices=["fetch", "fit", "pricing", "figures"], action="append", help="Groupes à exécuter")
+    parser.add_argument("--output", default=RESULTS_PATH, help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Fichier JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Ralentissement relatif toléré")
+    parser.add_argument("--save-baseline", action="store_true", help="Enregistre les résultats comme référence")
+    parser.add_argument("--record", action="store_true", help="Enregistre les réponses réelles de l'API dans fixtures/")
+    parser.add_argument("--record-synthetic", action="store_true", help="Enregistre des réponses synthétiques dans fixtures/")
+    args = parser.parse_args(argv)
+
+    if args.record or args.record_synthetic:
+        record_fixtures(synthetic=args.record_synthetic)
+        return 0
+
+    # Cache disque isolé pour ne pas dépendre de l'état local
+    import tempfile
+    os.environ["WIND_CACHE_DIR"] = tempfile.mkdtemp(prefix="wind_bench_")
+
+    groups = {"fetch": bench_fetch, "fit": bench_fit, "pricing": bench_pricing, "figures": bench_figures}
+    results = {}
+    for group in args.only or groups:
+        print(f"Benchmark : {group}")
+        groups[group](results, args.repeat)
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__
+        },
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats enregistrés : {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Référence enregistrée : {args.baseline}")
+        return 0
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+"""
+Service HTTP de cotation : primes calculées à la demande, sans passer par Streamlit.
+
+Exemples :
+    python quote_api.py --port 8080 --workers 8
+    curl -X POST localhost:8080/quote -d '{"latitude": 44.2971, "longitude": 0.1178, "threshold": 35, "exposure": 1000000}'
+    curl -X POST localhost:8080/quote -d '{"quotes": [{"id": "A", ...}, {"id": "B", ...}]}'
+
+Endpoints :
+    POST /quote    une cotation (objet JSON) ou un lot ({"quotes": [...]})
+    GET  /health   état du service et nombre de modèles en mémoire
+    GET  /metrics  mesures au format texte Prometheus
+
+Chaque cotation contient latitude, longitude, threshold, exposure et optionnellement id,
+start_date, end_date et loading_factor (ou confidence_level). Les modèles de Weibull calibrés
+sont gardés en mémoire par site : seule la première cotation d'un site télécharge et calibre.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from src import metrics
+from src.data_fetcher import WindDataFetchError, get_wind_data
+from src.fit_store import FitStore
+from src.model_wind import clean_wind_speeds, get_weibull_model
+from src.pricer import price_portfolio
+from src.wind_cache import round_coords
+from src.wind_series import WindSeries
+
+# Période et chargement par défaut (mêmes valeurs que l'application)
+DEFAULT_START_DATE = "2022-01-01"
+DEFAULT_END_DATE = "2025-12-31"
+DEFAULT_LOADING_FACTOR = 1.2
+
+# Modèles gardés en mémoire (un par site et période) et durée de validité
+MODEL_CACHE_SIZE = 4096
+MODEL_TTL_SECONDS = 6 * 3600
+
+# En dessous d'un an de vitesses exploitables, le calibrage est dégénéré (shape démesuré, prime nulle)
+MIN_HISTORY_DAYS = 365
+
+DEFAULT_WORKERS = 8
+MAX_QUOTES_PER_REQUEST = 1000
+MAX_BODY_BYTES = 1_000_000
+
+
+class QuoteError(ValueError):
+    """
+    Cotation invalide ou impossible (message renvoyé tel quel au client)
+    """
+
+
+def _error_result(quote_id, error):
+    """
+    Résultat en erreur d'une cotation, avec le statut HTTP correspondant : 400 pour une demande
+    invalide, 502 si Open-Meteo est en échec, 500 pour toute autre erreur (trace dans les logs)
+    """
+    if isinstance(error, QuoteError):
+        status, message = 400, str(error)
+    elif isinstance(error, WindDataFetchError):
+        status, message = 502, str(error)
+    else:
+        traceback.print_exception(error, file=sys.stderr)
+        metrics.increment("quote.internal_error")
+        status, message = 500, f"Erreur interne : {type(error).__name__}: {error}"
+    return {"id": quote_id, "error": message, "status": status}
+
+
+class ModelCache:
+    """
+    Cache LRU des modèles calibrés par site. Si plusieurs requêtes demandent en même temps
+    un site absent du cache, un seul calibrage est lancé et les autres attendent son résultat.
+    """
+
+    def __init__(self, max_size=MODEL_CACHE_SIZE, ttl=MODEL_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, compute):
+        """
+        Retourne (valeur, trouvée_en_cache) ; compute() n'est appelé qu'en cas d'absence
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                metrics.increment("quote.model_cache.hit")
+                return entry[1], True
+            future = self._pending.get(key)
+            owner = future is None
+            if owner:
+                future = self._pending[key] = Future()
+
+        if not owner:
+            metrics.increment("quote.model_cache.shared")
+            return future.result(), True
+
+        metrics.increment("quote.model_cache.miss")
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            del self._pending[key]
+        future.set_result(value)
+        return value, False
+
+
+def _number(quote, field, minimum=None, maximum=None, default=None):
+    value = quote.get(field, default)
+    if value is None:
+        raise QuoteError(f"Champ obligatoire manquant : {field}")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise QuoteError(f"{field} doit être un nombre (reçu : {value!r})")
+    if not np.isfinite(value) or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise QuoteError(f"{field} hors bornes : {value}")
+    return value
+
+
+def parse_quote(quote):
+    """
+    Valide une demande de cotation et la complète avec les valeurs par défaut
+    """
+    if not isinstance(quote, dict):
+        raise QuoteError("Chaque cotation doit être un objet JSON")
+
+    parsed = {
+        "id": quote.get("id"),
+        "latitude": _number(quote, "latitude", -90, 90),
+        "longitude": _number(quote, "longitude", -180, 180),
+        "threshold": _number(quote, "threshold", 0),
+        "exposure": _number(quote, "exposure", 0),
+        "start_date": str(quote.get("start_date", DEFAULT_START_DATE)),
+        "end_date": str(quote.get("end_date", DEFAULT_END_DATE))
+    }
+    try:
+        start, end = date.fromisoformat(parsed["start_date"]), date.fromisoformat(parsed["end_date"])
+    except ValueError:
+        raise QuoteError("Dates attendues au format AAAA-MM-JJ")
+    if start > end:
+        raise QuoteError("start_date doit précéder end_date")
+
+    # Même convention que l'application : confidence_level = 1 / facteur de chargement
+    if "confidence_level" in quote:
+        parsed["confidence_level"] = _number(quote, "confidence_level", 0, 1)
+    else:
+        parsed["confidence_level"] = 1 / _number(quote, "loading_factor", 1, default=DEFAULT_LOADING_FACTOR)
+    return parsed
+
+
+class QuoteService:
+    """
+    Cotations unitaires ou par lots : calibrages en parallèle sur un pool de threads,
+    puis tarification vectorisée de tout le lot
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, cache_size=MODEL_CACHE_SIZE, ttl=MODEL_TTL_SECONDS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote")
+        self.models = ModelCache(cache_size, ttl)
+        # Calibrages précalculés par le planificateur de la liste de suivi
+        self.fit_store = FitStore()
+        self.workers = workers
+        self.started_at = time.time()
+
+    def model(self, latitude, longitude, start_date, end_date):
+        """
+        Paramètres de Weibull du site (calibrés une seule fois, puis servis depuis la mémoire)
+        """
+        latitude, longitude = round_coords(latitude, longitude)
+
+        def fit():
+            series = WindSeries.from_frame(get_wind_data(latitude, longitude, start_date, end_date))
+            n_usable = len(clean_wind_speeds(series))
+            if n_usable < MIN_HISTORY_DAYS:
+                raise QuoteError(f"Historique insuffisant : {n_usable} jours exploitables "
+                                 f"(minimum {MIN_HISTORY_DAYS}) pour ce site et cette période")
+            model = get_weibull_model(series, lookup=self.fit_store.params)
+            return {"shape": float(model.shape), "scale": float(model.scale), "n_days": len(series)}
+
+        return self.models.get((latitude, longitude, start_date, end_date), fit)
+
+    def quote(self, quotes):
+        """
+        Cote une liste de demandes ; les demandes invalides ou en échec reçoivent les champs
+        "error" et "status" sans empêcher la cotation des autres
+        """
+        with metrics.span("quote.batch", n=len(quotes)):
+            results = [None] * len(quotes)
+            futures = {}
+            for i, quote in enumerate(quotes):
+                try:
+                    parsed = parse_quote(quote)
+                except Exception as e:
+                    results[i] = _error_result(quote.get("id") if isinstance(quote, dict) else None, e)
+                    continue
+                futures[i] = (parsed, self.executor.submit(
+                    self.model, parsed["latitude"], parsed["longitude"], parsed["start_date"], parsed["end_date"]
+                ))
+
+            priced = []
+            for i, (parsed, future) in futures.items():
+                try:
+                    model, cached = future.result()
+                except Exception as e:
+                    results[i] = _error_result(parsed["id"], e)
+                    continue
+                priced.append((i, parsed, model, cached))
+
+            if priced:
+                try:
+                    premium_df = price_portfolio(
+                        shape=[model["shape"] for _, _, model, _ in priced],
+                        scale=[model["scale"] for _, _, model, _ in priced],
+                        threshold=[parsed["threshold"] for _, parsed, _, _ in priced],
+                        exposure=[parsed["exposure"] for _, parsed, _, _ in priced],
+                        confidence_level=[parsed["confidence_level"] for _, parsed, _, _ in priced]
+                    )
+                except Exception as e:
+                    # Tarification du lot en échec : chaque cotation calibrée reçoit l'erreur
+                    error = _error_result(None, e)
+                    for i, parsed, _, _ in priced:
+                        results[i] = dict(error, id=parsed["id"])
+                    return results
+                for (i, parsed, model, cached), row in zip(priced, premium_df.itertuples(index=False)):
+                    results[i] = {
+                        "id": parsed["id"],
+                        "latitude": parsed["latitude"],
+                        "longitude": parsed["longitude"],
+                        "start_date": parsed["start_date"],
+                        "end_date": parsed["end_date"],
+                        "threshold": parsed["threshold"],
+                        "exposure": parsed["exposure"],
+                        "shape": model["shape"],
+                        "scale": model["scale"],
+                        "n_days": model["n_days"],
+                        "exceedance_probability": float(row[0]),
+                        "pure_premium": float(row[2]),
+                        "safety_margin": float(row[3]),
+                        "total_premium": float(row[4]),
+                        "cached": cached
+                    }
+        return results
+
+    def health(self):
+        return {
+            "status": "ok",
+            "pid": os.getpid(),
+            "workers": self.workers,
+            "cached_models": len(self.models),
+            "uptime_s": round(time.time() - self.started_at, 1)
+        }
+
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 : connexions réutilisées par les clients (keep-alive)
+    protocol_version = "HTTP/1.1"
+    # Sans TCP_NODELAY, l'envoi séparé des en-têtes et du corps coûte ~40 ms (Nagle + ACK retardé)
+    disable_nagle_algorithm = True
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = (json.dumps(body, ensure_ascii=False) if content_type == "application/json" else body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == "/health":
+            self._send(200, service.health())
+        elif self.path == "/metrics":
+            gauge = f"# TYPE wind_quote_cached_models gauge\nwind_quote_cached_models {len(service.models)}\n"
+            self._send(200, metrics.to_prometheus() + gauge, content_type="text/plain")
+        else:
+            self._send(404, {"error": f"Endpoint inconnu : {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/quote":
+            self._send(404, {"error": f"Endpoint inconnu : {self.path}"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send(413, {"error": f"Requête trop volumineuse (max {MAX_BODY_BYTES} octets)"})
+            return
+
+        t0 = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except json.JSONDecodeError as e:
+            self._send(400, {"error": f"JSON invalide : {e}"})
+            return
+
+        batch = isinstance(payload, dict) and "quotes" in payload
+        quotes = payload["quotes"] if batch else [payload]
+        if not isinstance(quotes, list) or len(quotes) > MAX_QUOTES_PER_REQUEST:
+            self._send(400, {"error": f"'quotes' doit être une liste d'au plus {MAX_QUOTES_PER_REQUEST} cotations"})
+            return
+
+        try:
+            results = self.server.service.quote(quotes)
+        except Exception as e:
+            # Échec de toute la requête : réponse JSON plutôt qu'une connexion coupée
+            self._send(500, _error_result(None, e))
+            return
+        elapsed_ms = 1000 * (time.perf_counter() - t0)
+        if batch:
+            self._send(200, {"quotes": results, "elapsed_ms": round(elapsed_ms, 2)})
+        else:
+            self._send(results[0].get("status", 200), results[0])
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class QuoteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # File d'attente des connexions : la valeur par défaut (5) provoque des refus sous charge
+    request_queue_size = 128
+
+
+def serve(host="127.0.0.1", port=8080, workers=DEFAULT_WORKERS, processes=1, cache_size=MODEL_CACHE_SIZE,
+          verbose=False):
+    """
+    Démarre le service. Avec processes > 1, les processus se partagent le même port
+    (chacun avec son pool de workers et son cache de modèles)
+    """
+    server = QuoteServer((host, port), QuoteHandler)
+    server.verbose = verbose
+
+    children = []
+    if processes > 1 and hasattr(os, "fork"):
+        for _ in range(processes - 1):
+            pid = os.fork()
+            if pid == 0:
+                children = None
+                break
+            children.append(pid)
+
+    # Pool de threads créé après le fork (les threads ne survivent pas au fork)
+    server.service = QuoteService(workers=workers, cache_size=cache_size)
+    if children is not None:
+        print(f"Service de cotation : http://{host}:{server.server_address[1]} "
+              f"({1 + len(children)} processus x {workers} workers)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for pid in children or []:
+            os.kill(pid, signal.SIGTERM)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP de cotation")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse d'écoute")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8080)), help="Port d'écoute")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Threads de calibration par processus")
+    parser.add_argument("--processes", type=int, default=1, help="Nombre de processus partageant le port")
+    parser.add_argument("--cache-size", type=int, default=MODEL_CACHE_SIZE, help="Modèles gardés en mémoire par processus")
+    parser.add_argument("--verbose", action="store_true", help="Journalise chaque requête")
+    args = parser.parse_args(argv)
+
+    # Mesures exposées sur /metrics
+    metrics.enable()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    serve(args.host, args.port, args.workers, args.processes, args.cache_size, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import numpy as np
+
+from src import metrics
+from src.data_fetcher import WindDataFetchError, fetch_wind_data_bulk
+from src.lazy_imports import lazy_import
+from src.wind_series import WindSeries
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+# Pas de la grille des cellules (°) : proche de la résolution d'Open-Meteo, et les cellules
+# recalées sur cette grille partagent leur fichier du cache disque d'une zone à l'autre
+GRID_STEP = 0.1
+
+# Au-delà, la zone est refusée (téléchargement et mémoire proportionnels au nombre de cellules)
+MAX_AREA_CELLS = 400
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _distance_km(latitudes, longitudes, latitude, longitude):
+    # Haversine entre des cellules et un point
+    lat, lon = np.radians(latitudes), np.radians(longitudes)
+    lat0, lon0 = np.radians(latitude), np.radians(longitude)
+    a = np.sin((lat - lat0) / 2) ** 2 + np.cos(lat) * np.cos(lat0) * np.sin((lon - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _grid(lat_min, lat_max, lon_min, lon_max, step):
+    # Centres des cellules de la grille couvrant le rectangle
+    lats = np.arange(np.floor(lat_min / step), np.ceil(lat_max / step) + 1) * step
+    lons = np.arange(np.floor(lon_min / step), np.ceil(lon_max / step) + 1) * step
+    lat_grid, lon_grid = np.meshgrid(np.round(lats, 6), np.round(lons, 6), indexing="ij")
+    return lat_grid.ravel(), lon_grid.ravel()
+
+
+def _inside_polygon(latitudes, longitudes, polygon):
+    # Lancer de rayon vectorisé sur toutes les cellules à la fois
+    vertices = np.asarray(polygon, dtype=float)
+    y1, x1 = vertices[:, 0], vertices[:, 1]
+    y2, x2 = np.roll(y1, -1), np.roll(x1, -1)
+    y, x = latitudes[:, None], longitudes[:, None]
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return np.count_nonzero(crosses & (x < x_cross), axis=1) % 2 == 1
+
+
+def parse_polygon(text):
+    """
+    Sommets d'un polygone saisis sous forme de lignes « latitude, longitude »
+    """
+    vertices = []
+    for line in text.strip().splitlines():
+        if line.strip():
+            latitude, longitude = (float(value) for value in line.replace(";", ",").split(","))
+            vertices.append((latitude, longitude))
+    if len(vertices) < 3:
+        raise ValueError("Un polygone doit avoir au moins 3 sommets")
+    return tuple(vertices)
+
+
+def area_cells(latitude=None, longitude=None, radius_km=None, polygon=None, step=GRID_STEP, max_cells=MAX_AREA_CELLS):
+    """
+    Cellules de la grille couvrant une zone : disque de rayon radius_km autour du point, ou polygone
+    (suite de sommets (latitude, longitude)). Retourne un DataFrame site_id, latitude, longitude.
+
+    La cellule la plus proche du point (ou du centre du polygone) est toujours retenue,
+    même si la zone est plus petite qu'une cellule.
+    """
+    if polygon is not None:
+        vertices = np.asarray(polygon, dtype=float)
+        latitudes, longitudes = _grid(vertices[:, 0].min(), vertices[:, 0].max(),
+                                      vertices[:, 1].min(), vertices[:, 1].max(), step)
+        inside = _inside_polygon(latitudes, longitudes, vertices)
+        latitude, longitude = vertices.mean(axis=0)
+    elif radius_km is not None:
+        dlat = radius_km / (EARTH_RADIUS_KM * np.pi / 180)
+        dlon = dlat / max(np.cos(np.radians(latitude)), 1e-6)
+        latitudes, longitudes = _grid(latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon, step)
+        inside = _distance_km(latitudes, longitudes, latitude, longitude) <= radius_km
+    else:
+        raise ValueError("Indiquer un rayon (radius_km) ou un polygone")
+
+    nearest = np.argmin(_distance_km(latitudes, longitudes, latitude, longitude))
+    inside[nearest] = True
+    if inside.sum() > max_cells:
+        raise ValueError(f"Zone trop grande : {inside.sum()} cellules (maximum {max_cells})")
+
+    latitudes, longitudes = latitudes[inside], longitudes[inside]
+    return pd.DataFrame({
+        "site_id": [f"{lat:+.2f}_{lon:+.2f}" for lat, lon in zip(latitudes, longitudes)],
+        "latitude": latitudes,
+        "longitude": longitudes
+    })
+
+
+def area_max_series(frames):
+    """
+    Maximum journalier sur toutes les cellules : les séries sont alignées sur un même calendrier
+    puis réduites en une opération (les jours sans aucune donnée sont ignorés)
+    """
+    dates = [np.asarray(df["date"], dtype="datetime64[D]") for df in frames]
+    first = min(d.min() for d in dates if len(d))
+    last = max(d.max() for d in dates if len(d))
+    speeds = np.full((len(frames), (last - first).astype(int) + 1), np.nan, dtype=float)
+    for row, (cell_dates, df) in enumerate(zip(dates, frames)):
+        speeds[row, (cell_dates - first).astype(int)] = np.asarray(df["wind_speed_max"], dtype=float)
+
+    observed = ~np.isnan(speeds).all(axis=0)
+    return WindSeries(np.arange(first, last + 1)[observed], np.nanmax(speeds[:, observed], axis=0))
+
+
+@metrics.timed("area.wind_data")
+def get_area_wind_data(cells, start_date, end_date):
+    """
+    Série du maximum journalier de vent sur les cellules d'une zone (résultat d'area_cells).
+
+    Les cellules passent par le téléchargement multi-sites et le cache disque : seules les
+    cellules et dates absentes du cache sont téléchargées, en requêtes groupées.
+    """
+    frames, errors = {}, []
+    for result in fetch_wind_data_bulk(cells, start_date, end_date):
+        if result.error is not None:
+            errors.append(f"{result.site_id} : {result.error}")
+        else:
+            frames[result.site_id] = result.data
+    if errors:
+        raise WindDataFetchError(f"{len(errors)} cellules sur {len(cells)} en erreur ({errors[0]})")
+
+    frames = [frames[site_id] for site_id in cells["site_id"] if len(frames[site_id])]
+    if not frames:
+        raise WindDataFetchError("Aucune donnée de vent pour cette zone et cette période")
+    return area_max_series(frames)
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from src.open_meteo_stub import start_stub_server
+
+    # Faux serveur Open-Meteo et cache disque temporaire
+    stub, archive_url = start_stub_server()
+    import src.data_fetcher as data_fetcher
+    from src.wind_cache import WindDataStore
+    data_fetcher.ARCHIVE_URL = archive_url
+    data_fetcher._store = WindDataStore(tempfile.mkdtemp())
+
+    # Premier appel hors mesure : imports de pandas et pyarrow
+    get_area_wind_data(area_cells(48.0, 2.0, radius_km=0), "2024-01-01", "2024-01-31")
+
+    # Référence : un seul point (même chemin de téléchargement)
+    t0 = time.perf_counter()
+    get_area_wind_data(area_cells(46.0, 2.0, radius_km=0), "1995-01-01", "2024-12-31")
+    t_point = time.perf_counter() - t0
+
+    cells = area_cells(44.30, 0.12, radius_km=15)
+    print(f"Rayon de 15 km : {len(cells)} cellules")
+
+    t0 = time.perf_counter()
+    series = get_area_wind_data(cells, "1995-01-01", "2024-12-31")
+    t_cold = time.perf_counter() - t0
+
+    # Zone voisine qui chevauche la première : les cellules communes viennent du cache
+    overlapping = area_cells(44.35, 0.20, radius_km=15)
+    t0 = time.perf_counter()
+    get_area_wind_data(overlapping, "1995-01-01", "2024-12-31")
+    t_overlap = time.perf_counter() - t0
+    shared = len(set(cells["site_id"]) & set(overlapping["site_id"]))
+    print(f"Point : {t_point:.2f} s | zone : {t_cold:.2f} s | "
+          f"zone voisine ({shared}/{len(overlapping)} cellules en cache) : {t_overlap:.2f} s")
+    print(series)
+    stub.shutdown()
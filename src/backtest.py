@@ -0,0 +1,124 @@
+import numpy as np
+
+from src.lazy_imports import lazy_import
+from src.model_wind import _stack_series, fit_weibull_batch, get_weibull_model
+from src.pricer import price_portfolio
+from src.wind_series import WindSeries
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+# Durée d'un contrat (jours) : une fenêtre glissante par jour de début possible
+CONTRACT_DAYS = 365
+
+
+def rolling_exceedance_counts(wind_speeds, thresholds, window=CONTRACT_DAYS):
+    """
+    Nombre de jours au-dessus de chaque seuil pour toutes les fenêtres glissantes de `window` jours.
+
+    `wind_speeds` est une série (n_jours,) ou un tableau de séries (n_sites, n_jours).
+    Retourne un tableau (..., n_fenêtres, n_seuils) calculé par sommes cumulées.
+    """
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+
+    # Les valeurs manquantes ne déclenchent pas
+    exceed = wind_speeds[..., None] > thresholds
+    cumulative = np.cumsum(exceed, axis=-2, dtype=np.int32)
+    cumulative = np.concatenate([np.zeros_like(cumulative[..., :1, :]), cumulative], axis=-2)
+    return cumulative[..., window:, :] - cumulative[..., :-window, :]
+
+
+def _payouts(counts, exposure, payout):
+    if payout == "binary":
+        return (counts > 0) * exposure
+    if payout == "per_event":
+        return counts * exposure
+    raise ValueError(f"Mode de paiement inconnu : {payout} (attendu : 'per_event' ou 'binary')")
+
+
+def burn_cost_table(df, thresholds, exposure, shape=None, scale=None, confidence_level=0.95,
+                    window=CONTRACT_DAYS, payout="per_event"):
+    """
+    Burn cost historique du contrat paramétrique pour chaque seuil, comparé à la prime modélisée.
+
+    Le contrat est rejoué sur toutes les fenêtres de `window` jours de l'historique.
+    En mode "per_event", chaque jour au-dessus du seuil paie l'exposition ; en mode "binary",
+    le contrat paie l'exposition une fois si le seuil est franchi au moins une fois.
+    """
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    wind_speeds = np.asarray(df['wind_speed_max'], dtype=float)
+    if len(wind_speeds) < window:
+        raise ValueError(f"Historique trop court : {len(wind_speeds)} jours pour des contrats de {window} jours")
+
+    counts = rolling_exceedance_counts(wind_speeds, thresholds, window)
+    payouts = _payouts(counts, exposure, payout)
+
+    # Prime modélisée (mêmes résultats que calculate_premium, tous les seuils en une passe)
+    if shape is None or scale is None:
+        model = get_weibull_model(df)
+        shape, scale = model.shape, model.scale
+    premium_df = price_portfolio(shape=shape, scale=scale, threshold=thresholds, exposure=exposure,
+                                 confidence_level=confidence_level)
+    probability = premium_df["Probabilité de dépassement du seuil"].to_numpy()
+    if payout == "binary":
+        modelled_contract = (1 - (1 - probability) ** window) * exposure
+    else:
+        modelled_contract = probability * window * exposure
+
+    return pd.DataFrame({
+        "Seuil": thresholds,
+        "Nombre de fenêtres": counts.shape[0],
+        "Fenêtres déclenchées (%)": 100 * (counts > 0).mean(axis=0),
+        "Dépassements moyens par contrat": counts.mean(axis=0),
+        "Burn cost par contrat": payouts.mean(axis=0),
+        "Burn cost max par contrat": payouts.max(axis=0),
+        "Burn cost journalier": counts.mean(axis=0) / window * exposure,
+        "Prime pure": premium_df["Prime pure"].to_numpy(),
+        "Prime modélisée par contrat": modelled_contract
+    })
+
+
+def backtest_sites(series_by_site, thresholds, exposure, window=CONTRACT_DAYS, payout="per_event"):
+    """
+    Burn cost de plusieurs sites en une passe : `series_by_site` associe à chaque site
+    son DataFrame ou sa WindSeries (ou directement le tableau des vitesses).
+    """
+    site_ids = list(series_by_site)
+    series = [np.asarray(data['wind_speed_max'] if isinstance(data, (pd.DataFrame, WindSeries)) else data, dtype=float)
+              for data in series_by_site.values()]
+    lengths = np.array([len(x) for x in series])
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+
+    # Séries complétées par des NaN : les fenêtres qui débordent de l'historique sont ignorées
+    data = _stack_series(series)
+    counts = rolling_exceedance_counts(data, thresholds, window).astype(float)
+    starts = np.arange(counts.shape[1])
+    counts[starts[None, :] + window > lengths[:, None]] = np.nan
+
+    payouts = np.where(np.isnan(counts), np.nan, _payouts(np.nan_to_num(counts), exposure, payout))
+    shapes, scales = fit_weibull_batch(series)
+    premium_df = price_portfolio(shape=np.repeat(shapes, len(thresholds)), scale=np.repeat(scales, len(thresholds)),
+                                 threshold=np.tile(thresholds, len(site_ids)), exposure=exposure)
+
+    with np.errstate(invalid="ignore"):
+        return pd.DataFrame({
+            "site_id": np.repeat(site_ids, len(thresholds)),
+            "Seuil": np.tile(thresholds, len(site_ids)),
+            "Nombre de fenêtres": np.repeat(np.maximum(lengths - window + 1, 0), len(thresholds)),
+            "Dépassements moyens par contrat": np.nanmean(counts, axis=1).ravel(),
+            "Burn cost par contrat": np.nanmean(payouts, axis=1).ravel(),
+            "Burn cost journalier": (np.nanmean(counts, axis=1) / window * exposure).ravel(),
+            "Prime pure": premium_df["Prime pure"].to_numpy()
+        })
+
+
+# Test
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"wind_speed_max": 22.0 * rng.weibull(2.3, size=20 * 365)})
+    print(burn_cost_table(df, thresholds=[35, 45, 55], exposure=100000, confidence_level=1 / 1.2))
+    print(burn_cost_table(df, thresholds=[35, 45, 55], exposure=100000, payout="binary"))
+
+    sites = {f"S{i}": 22.0 * rng.weibull(2.3, size=rng.integers(4, 10) * 365) for i in range(3)}
+    print(backtest_sites(sites, thresholds=[40, 50], exposure=100000))
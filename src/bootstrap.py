@@ -0,0 +1,98 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.lazy_imports import lazy_import
+from src.model_wind import clean_wind_speeds, fit_weibull_batch, get_weibull_model
+from src.pricer import price_portfolio
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+# Nombre de réplications traitées ensemble (un appel au calibrage par lots par paquet)
+REPLICATES_PER_CHUNK = 250
+
+
+def _resample_indices(rng, n, n_boot, block_length=None):
+    """
+    Indices de rééchantillonnage : simple, ou par blocs circulaires pour conserver la saisonnalité
+    """
+    if not block_length:
+        return rng.integers(0, n, size=(n_boot, n))
+
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n, size=(n_boot, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_length)) % n
+    return indices.reshape(n_boot, -1)[:, :n]
+
+
+def _bootstrap_chunk(task):
+    seed, n_boot, sample, block_length = task
+    rng = np.random.default_rng(seed)
+    indices = _resample_indices(rng, len(sample), n_boot, block_length)
+    return fit_weibull_batch(sample[indices])
+
+
+def bootstrap_premium(df, threshold, exposure, confidence_level=0.95, n_boot=1000, block_length=None,
+                      interval=0.90, seed=0, max_workers=None):
+    """
+    Intervalles de confiance bootstrap des paramètres de Weibull, de la probabilité de
+    dépassement et de la prime.
+
+    L'historique est rééchantillonné (par blocs de `block_length` jours si renseigné),
+    chaque réplication est recalibrée avec le calibrage par lots, et les paquets de
+    réplications sont répartis sur un pool de processus.
+    """
+    sample = clean_wind_speeds(df)
+    model = get_weibull_model(df)
+
+    # Paquets de réplications, chacun avec sa graine dérivée de `seed` (résultats reproductibles)
+    chunk_sizes = [min(REPLICATES_PER_CHUNK, n_boot - start) for start in range(0, n_boot, REPLICATES_PER_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = [(chunk_seed, size, sample, block_length) for chunk_seed, size in zip(seeds, chunk_sizes)]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) == 1:
+        results = list(map(_bootstrap_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            results = list(executor.map(_bootstrap_chunk, tasks))
+
+    shapes = np.concatenate([shapes for shapes, _ in results])
+    scales = np.concatenate([scales for _, scales in results])
+
+    # Tarification de toutes les réplications en une passe
+    replicates_df = price_portfolio(shape=shapes, scale=scales, threshold=threshold, exposure=exposure,
+                                    confidence_level=confidence_level)
+    point_df = price_portfolio(shape=model.shape, scale=model.scale, threshold=threshold, exposure=exposure,
+                               confidence_level=confidence_level)
+
+    estimates = {
+        "shape": (model.shape, shapes),
+        "scale": (model.scale, scales),
+        "Probabilité de dépassement du seuil": (point_df["Probabilité de dépassement du seuil"].iloc[0],
+                                                replicates_df["Probabilité de dépassement du seuil"].to_numpy()),
+        "Prime totale": (point_df["Prime totale"].iloc[0], replicates_df["Prime totale"].to_numpy())
+    }
+
+    alpha = (1 - interval) / 2
+    rows = []
+    for name, (estimate, values) in estimates.items():
+        lower, upper = np.nanquantile(values, [alpha, 1 - alpha])
+        rows.append({"Paramètre": name, "Estimation": estimate, "Borne inférieure": lower, "Borne supérieure": upper})
+    return pd.DataFrame(rows)
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"wind_speed_max": 22.0 * rng.weibull(2.3, size=4 * 365)})
+
+    t0 = time.perf_counter()
+    intervals = bootstrap_premium(df, threshold=35, exposure=1000000, confidence_level=1 / 1.2,
+                                  n_boot=2000, block_length=30)
+    print(f"2000 réplications en {time.perf_counter() - t0:.2f} s")
+    print(intervals)
@@ -1,15 +1,156 @@
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
 
-import requests
-import pandas as pd
+import numpy as np
 
-def get_wind_data(latitude, longitude, start_date, end_date):
+from src import metrics
+from src.lazy_imports import lazy_import
+from src.wind_cache import WindDataStore, round_coords
 
+# Modules lourds chargés à la première utilisation (démarrage plus rapide de l'application)
+pd = lazy_import("pandas")
+requests = lazy_import("requests")
+
+# URL de l'API d'archive (surchargeable, ex: faux serveur local pour les tests)
+ARCHIVE_URL = os.environ.get("OPEN_METEO_ARCHIVE_URL", "https://archive-api.open-meteo.com/v1/archive")
+
+# Paramètres réseau
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Téléchargement multi-sites : nombre de requêtes simultanées et de coordonnées par requête
+MAX_CONCURRENT_REQUESTS = 8
+MAX_SITES_PER_REQUEST = 50
+
+# Mode horaire : nombre de jours téléchargés et agrégés par requête
+HOURLY_WINDOW_DAYS = 90
+
+_store = None
+_session = None
+_session_lock = threading.Lock()
+
+# Pause commune à tous les threads lorsque l'API signale une limite de débit (429)
+_pause_until = 0.0
+_pause_lock = threading.Lock()
+
+# Résultat du téléchargement d'un site (data est None si error est renseigné)
+SiteResult = namedtuple("SiteResult", ["site_id", "data", "error"])
+
+
+class WindDataFetchError(Exception):
+    """
+    Erreur de récupération des données de vent depuis Open-Meteo
+    """
+
+
+class WindDataRequestRejected(WindDataFetchError):
     """
-    Récupère les données historiques de vent depuis Open-Meteo API
+    Requête refusée par Open-Meteo (paramètres invalides) : la renvoyer telle quelle échouerait encore
+    """
+
+
+def get_store():
+    """
+    Cache disque partagé des historiques de vent
+    """
+    global _store
+    if _store is None:
+        _store = WindDataStore()
+    return _store
+
+
+def get_session():
+    """
+    Session HTTP partagée (connexions réutilisées entre les requêtes et les threads)
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            from requests.adapters import HTTPAdapter
+
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+    return _session
+
+
+def _wait_for_rate_limit():
+    delay = _pause_until - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def _pause_all(delay):
+    global _pause_until
+    with _pause_lock:
+        _pause_until = max(_pause_until, time.monotonic() + delay)
+
+
+def request_archive(params):
+    """
+    Appelle l'API d'archive avec timeout, nouvelles tentatives et attente exponentielle.
+    Lève WindDataFetchError si la requête échoue définitivement.
+    """
+    session = get_session()
+    error = None
+
+    for attempt in range(MAX_RETRIES + 1):
+        _wait_for_rate_limit()
+        delay = BACKOFF_BASE * 2 ** attempt * (1 + random.random())
+
+        try:
+            with metrics.span("open_meteo.request", attempt=attempt) as request_span:
+                response = session.get(ARCHIVE_URL, params=params, timeout=REQUEST_TIMEOUT)
+                request_span.set(status=response.status_code, bytes=len(response.content))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = WindDataFetchError(f"Open-Meteo injoignable : {e}")
+        else:
+            if response.status_code in RETRY_STATUS_CODES:
+                error = WindDataFetchError(f"Open-Meteo a répondu {response.status_code}")
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+                if response.status_code == 429:
+                    _pause_all(delay)
+            elif not response.ok:
+                raise WindDataRequestRejected(f"Open-Meteo a répondu {response.status_code} : {response.text[:200]}")
+            else:
+                with metrics.span("open_meteo.parse", bytes=len(response.content)):
+                    data = response.json()
+                if isinstance(data, dict) and data.get("error"):
+                    raise WindDataRequestRejected(f"Open-Meteo a refusé la requête : {data.get('reason')}")
+                return data
+
+        metrics.increment("open_meteo.retry")
+        if attempt < MAX_RETRIES:
+            time.sleep(delay)
+
+    raise error
+
+
+@metrics.timed("open_meteo.to_dataframe")
+def _daily_frame(data):
+    return pd.DataFrame({
+    'date': data['daily']['time'],
+    'wind_speed_max': data['daily']['wind_speed_10m_max']
+})
+
+
+def fetch_wind_data(latitude, longitude, start_date, end_date):
+
+    """
+    Télécharge les données historiques de vent depuis Open-Meteo API (sans cache)
     """
     
-    # 1. Définir l'URL et les paramètres
-    url = "https://archive-api.open-meteo.com/v1/archive"
+    # 1. Définir les paramètres
     params = {
         "latitude": latitude,
         "longitude": longitude,
@@ -19,20 +160,234 @@ def get_wind_data(latitude, longitude, start_date, end_date):
         "timezone": "auto"
     }
     
-    # 2. Faire la requête
-    response = requests.get(url, params=params)
-    
-    # 3. Parser le JSON
-    data = response.json()
+    # 2. Faire la requête et parser le JSON
+    data = request_archive(params)
     
-    # 4. Créer le DataFrame
-    df = pd.DataFrame({
-    'date': data['daily']['time'],
-    'wind_speed_max': data['daily']['wind_speed_10m_max']
-})
+    # 3. Créer le DataFrame
+    df = _daily_frame(data)
     return df
 
 
+def get_wind_data(latitude, longitude, start_date, end_date, use_cache=True):
+    """
+    Récupère les données historiques de vent depuis Open-Meteo API.
+    Avec le cache, seules les plages de dates manquantes sont téléchargées.
+    """
+    if not use_cache:
+        return fetch_wind_data(latitude, longitude, start_date, end_date)
+
+    store = get_store()
+    latitude, longitude = round_coords(latitude, longitude)
+
+    # Télécharger uniquement les trous et les fusionner dans le cache
+    gaps = store.missing_ranges(latitude, longitude, start_date, end_date)
+    metrics.increment("wind_cache.miss" if gaps else "wind_cache.hit")
+    for gap_start, gap_end in gaps:
+        gap_df = fetch_wind_data(latitude, longitude, gap_start, gap_end)
+        store.write(latitude, longitude, gap_df, gap_start, gap_end)
+
+    with metrics.span("wind_cache.read") as read_span:
+        df = store.read(latitude, longitude, start_date, end_date)
+        read_span.set(rows=len(df))
+    return df
+
+
+def _fetch_coordinates(coordinates, start_date, end_date):
+    """
+    Télécharge plusieurs coordonnées sur la même période en une seule requête
+    """
+    params = {
+        "latitude": ",".join(str(latitude) for latitude, _ in coordinates),
+        "longitude": ",".join(str(longitude) for _, longitude in coordinates),
+        "start_date": start_date,
+        "end_date": end_date,
+        "daily": "wind_speed_10m_max",
+        "timezone": "auto"
+    }
+    data = request_archive(params)
+
+    # L'API renvoie une liste lorsque plusieurs coordonnées sont demandées
+    payloads = data if isinstance(data, list) else [data]
+    if len(payloads) != len(coordinates):
+        raise WindDataFetchError(f"Réponse incomplète : {len(payloads)} sites reçus sur {len(coordinates)}")
+    return [_daily_frame(payload) for payload in payloads]
+
+
+def _fetch_batch(coordinates, start_date, end_date):
+    """
+    Comme _fetch_coordinates, mais renvoie pour chaque coordonnée son DataFrame ou son erreur :
+    si Open-Meteo refuse le lot (ex : une coordonnée invalide), il est coupé en deux et chaque
+    moitié redemandée, jusqu'à isoler les coordonnées refusées
+    """
+    try:
+        return _fetch_coordinates(coordinates, start_date, end_date)
+    except WindDataRequestRejected as e:
+        if len(coordinates) == 1:
+            return [e]
+        middle = len(coordinates) // 2
+        return (_fetch_batch(coordinates[:middle], start_date, end_date)
+                + _fetch_batch(coordinates[middle:], start_date, end_date))
+
+
+def _site_date(value, default):
+    # Date ISO de la ligne (NaN / NaT si la colonne est incomplète) ou, à défaut, celle passée en argument ;
+    # accepte chaînes, dates et Timestamp (colonnes datetime d'un Parquet), lève ValueError si invalide
+    for candidate in (value, default):
+        if candidate is None or (np.ndim(candidate) == 0 and pd.isna(candidate)) or str(candidate) == "":
+            continue
+        try:
+            return pd.Timestamp(candidate).date().isoformat()
+        except (TypeError, ValueError):
+            raise ValueError(f"Date invalide : {candidate!r}") from None
+    return None
+
+
+def fetch_wind_data_bulk(sites, start_date=None, end_date=None, use_cache=True,
+                         max_workers=MAX_CONCURRENT_REQUESTS, batch_size=MAX_SITES_PER_REQUEST):
+    """
+    Récupère les données de vent de nombreux sites en parallèle.
+
+    `sites` est un DataFrame (ou une liste de dicts) avec les colonnes site_id, latitude,
+    longitude et optionnellement start_date / end_date (sinon celles passées en argument).
+    Les sites proches (mêmes coordonnées arrondies) et de même période sont regroupés dans
+    une seule requête. Retourne un générateur de SiteResult(site_id, data, error), dans
+    l'ordre où les sites sont terminés. Lève ValueError dès l'appel si un site n'a pas de période.
+    """
+    records = sites.to_dict("records") if isinstance(sites, pd.DataFrame) else list(sites)
+
+    # Vérification dès l'appel, avant toute requête : une période manquante ou invalide partirait
+    # telle quelle à l'API et ferait échouer tout le lot
+    periods, undated, invalid = [], [], []
+    for index, record in enumerate(records):
+        try:
+            period = (_site_date(record.get("start_date"), start_date), _site_date(record.get("end_date"), end_date))
+        except ValueError as e:
+            invalid.append(f"{record.get('site_id', index)} ({e})")
+            continue
+        if None in period:
+            undated.append(record.get("site_id", index))
+        periods.append(period)
+    if undated:
+        raise ValueError(f"Période manquante (start_date / end_date) pour {len(undated)} sites, ex : {undated[:5]}")
+    if invalid:
+        raise ValueError(f"Période invalide pour {len(invalid)} sites, ex : {invalid[:5]}")
+    return _iter_bulk(records, periods, get_store() if use_cache else None, max_workers, batch_size)
+
+
+def _iter_bulk(records, periods, store, max_workers, batch_size):
+    # 1. Regrouper les sites par période à télécharger puis par coordonnées arrondies
+    windows = {}
+    for index, (record, (site_start, site_end)) in enumerate(zip(records, periods)):
+        site_id = record.get("site_id", index)
+        latitude, longitude = round_coords(record["latitude"], record["longitude"])
+
+        fetch_start, fetch_end = site_start, site_end
+        if store is not None:
+            gaps = store.missing_ranges(latitude, longitude, site_start, site_end)
+            metrics.increment("wind_cache.miss" if gaps else "wind_cache.hit")
+            if not gaps:
+                yield SiteResult(site_id, store.read(latitude, longitude, site_start, site_end), None)
+                continue
+            fetch_start, fetch_end = gaps[0][0], gaps[-1][1]
+
+        coordinates = windows.setdefault((fetch_start, fetch_end), {})
+        coordinates.setdefault((latitude, longitude), []).append((site_id, site_start, site_end))
+
+    # 2. Découper en requêtes de batch_size coordonnées au plus
+    batches = []
+    for (fetch_start, fetch_end), coordinates in windows.items():
+        keys = list(coordinates)
+        for i in range(0, len(keys), batch_size):
+            batch = {key: coordinates[key] for key in keys[i:i + batch_size]}
+            batches.append((fetch_start, fetch_end, batch))
+
+    # 3. Lancer les requêtes en parallèle et rendre chaque site dès que son lot est terminé
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_batch, list(batch), fetch_start, fetch_end): (fetch_start, fetch_end, batch)
+            for fetch_start, fetch_end, batch in batches
+        }
+        for future in as_completed(futures):
+            fetch_start, fetch_end, batch = futures[future]
+            try:
+                frames = future.result()
+            except Exception as e:
+                error = e if isinstance(e, WindDataFetchError) else WindDataFetchError(str(e))
+                for site_list in batch.values():
+                    for site_id, _, _ in site_list:
+                        yield SiteResult(site_id, None, error)
+                continue
+
+            for (latitude, longitude), df in zip(batch, frames):
+                # Coordonnée refusée par l'API : seuls ses sites sont en erreur, pas tout le lot
+                if isinstance(df, Exception):
+                    for site_id, _, _ in batch[(latitude, longitude)]:
+                        yield SiteResult(site_id, None, df)
+                    continue
+                if store is not None:
+                    store.write(latitude, longitude, df, fetch_start, fetch_end)
+                for site_id, site_start, site_end in batch[(latitude, longitude)]:
+                    if store is not None:
+                        site_df = store.read(latitude, longitude, site_start, site_end)
+                    else:
+                        site_df = df[(df["date"] >= site_start) & (df["date"] <= site_end)].reset_index(drop=True)
+                    yield SiteResult(site_id, site_df, None)
+
+
+def _summarize_hourly_window(data, thresholds):
+    """
+    Réduit une fenêtre de rafales horaires à des statistiques journalières
+    """
+    hourly = data['hourly']
+    days = np.asarray(hourly['time'], dtype='U16').astype('U10')
+    gusts = np.asarray(hourly['wind_gusts_10m'], dtype=float)
+
+    window_df = pd.DataFrame({'date': days, 'wind_gust_max': gusts})
+    for threshold in thresholds:
+        window_df[f'hours_above_{threshold:g}'] = gusts > threshold
+    grouped = window_df.groupby('date', sort=True)
+
+    summary = grouped['wind_gust_max'].max().to_frame()
+    for threshold in thresholds:
+        column = f'hours_above_{threshold:g}'
+        summary[column] = grouped[column].sum().astype(int)
+    return summary.reset_index()
+
+
+def iter_hourly_gust_windows(latitude, longitude, start_date, end_date, thresholds=(60,), window_days=HOURLY_WINDOW_DAYS):
+    """
+    Télécharge les rafales horaires (wind_gusts_10m) fenêtre par fenêtre et renvoie,
+    pour chaque fenêtre, le maximum journalier et le nombre d'heures au-dessus de chaque seuil.
+    Seule une fenêtre de données horaires est en mémoire à la fois.
+    """
+    thresholds = [thresholds] if np.isscalar(thresholds) else list(thresholds)
+    window_start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=window_days - 1), end)
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "start_date": window_start.isoformat(),
+            "end_date": window_end.isoformat(),
+            "hourly": "wind_gusts_10m",
+            "timezone": "auto"
+        }
+        yield _summarize_hourly_window(request_archive(params), thresholds)
+        window_start = window_end + timedelta(days=1)
+
+
+def get_hourly_gust_summary(latitude, longitude, start_date, end_date, thresholds=(60,), window_days=HOURLY_WINDOW_DAYS):
+    """
+    Statistiques journalières des rafales horaires sur toute la période
+    (colonnes date, wind_gust_max et hours_above_<seuil>).
+    Pour calibrer un modèle sur les rafales : renommer wind_gust_max en wind_speed_max.
+    """
+    windows = iter_hourly_gust_windows(latitude, longitude, start_date, end_date, thresholds, window_days)
+    return pd.concat(list(windows), ignore_index=True)
+
+
 # Test
 if __name__ == "__main__":
 
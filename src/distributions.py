@@ -0,0 +1,401 @@
+import math
+import os
+import warnings
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src import metrics
+from src.lazy_imports import lazy_import
+from src.model_wind import _stack_series, fit_weibull_batch
+
+# Modules lourds chargés à la première utilisation
+pd = lazy_import("pandas")
+stats = lazy_import("scipy.stats")
+special = lazy_import("scipy.special")
+
+# Nombre moyen de jours par bloc pour les lois des maxima (annuels ou mensuels)
+DAYS_PER_BLOCK = {"annual": 365.25, "monthly": 365.25 / 12}
+
+# Un bloc n'est retenu que s'il contient au moins cette part de jours renseignés
+BLOCK_COMPLETENESS = 0.9
+
+# En dessous de ce nombre de blocs complets, la loi des maxima n'est pas calibrée
+MIN_BLOCKS = 10
+
+# Les familles sont comparées sur la queue des vitesses journalières (au-delà de ce quantile de
+# chaque site), là où se situent les seuils tarifés et où les lois des maxima sont valables
+TAIL_QUANTILE = 0.9
+
+# Nombre de sites traités par tâche du pool de processus
+SITES_PER_CHUNK = 256
+
+# Critères de sélection disponibles (le plus petit est le meilleur)
+SELECTION_CRITERIA = ("aic", "bic", "ks")
+
+# Colonnes des paramètres dans les tableaux de résultats (complétées par des NaN)
+PARAM_COLUMNS = ["param_1", "param_2", "param_3"]
+
+GUMBEL_FIT_ITERATIONS = 20
+
+
+class DistributionFamily(ABC):
+    """
+    Famille de lois candidate : calibrage vectorisé sur plusieurs séries et loi journalière équivalente.
+
+    Une loi de maxima par blocs de b jours (F_bloc) donne la loi journalière équivalente F_bloc^(1/b),
+    fidèle dans la queue de distribution seulement : les familles sont donc comparées sur les
+    vitesses journalières au-delà du quantile TAIL_QUANTILE (loi conditionnelle au dépassement).
+    """
+
+    name = None
+    param_names = ()
+    block = None
+
+    @abstractmethod
+    def fit(self, data):
+        """
+        Paramètres (n_séries, n_paramètres) calibrés sur un tableau de séries complété par des NaN
+        """
+
+    @abstractmethod
+    def frozen(self, params):
+        """
+        Loi scipy (paramètres en colonne, pour diffuser sur les jours de chaque série)
+        """
+
+    @property
+    def days_per_block(self):
+        return DAYS_PER_BLOCK[self.block] if self.block else 1.0
+
+    def daily_logpdf(self, x, params):
+        dist = self.frozen(params)
+        if not self.block:
+            return dist.logpdf(x)
+        b = self.days_per_block
+        return dist.logpdf(x) + (1 / b - 1) * dist.logcdf(x) - math.log(b)
+
+    def daily_cdf(self, x, params):
+        return self.frozen(params).cdf(x) ** (1 / self.days_per_block)
+
+    def daily_sf(self, x, params):
+        # 1 - F^(1/b) sans perte de précision dans la queue
+        dist = self.frozen(params)
+        if not self.block:
+            return dist.sf(x)
+        return -np.expm1(dist.logcdf(x) / self.days_per_block)
+
+    def exceedance_probability(self, threshold, params):
+        """
+        Probabilité journalière de dépassement du seuil, pour chaque jeu de paramètres
+        """
+        params = np.atleast_2d(np.asarray(params, dtype=float))
+        threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (len(params),))
+        return self.daily_sf(threshold[:, None], params)[:, 0]
+
+
+class WeibullFamily(DistributionFamily):
+    name = "weibull"
+    param_names = ("shape", "scale")
+
+    def fit(self, data):
+        shapes, scales = fit_weibull_batch(data)
+        return np.column_stack([shapes, scales])
+
+    def frozen(self, params):
+        return stats.weibull_min(params[:, 0:1], loc=0, scale=params[:, 1:2])
+
+
+class LognormalFamily(DistributionFamily):
+    name = "lognormal"
+    param_names = ("sigma", "mu")
+
+    def fit(self, data):
+        # Estimateurs du maximum de vraisemblance explicites sur ln(x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_x = np.log(np.where(data > 0, data, np.nan))
+            n = np.sum(~np.isnan(log_x), axis=1)
+            mu = np.nansum(log_x, axis=1) / n
+            sigma = np.sqrt(np.nansum((log_x - mu[:, None]) ** 2, axis=1) / n)
+        ok = (n >= 2) & (sigma > 0)
+        return np.column_stack([np.where(ok, sigma, np.nan), np.where(ok, mu, np.nan)])
+
+    def frozen(self, params):
+        return stats.lognorm(params[:, 0:1], loc=0, scale=np.exp(params[:, 1:2]))
+
+
+class GumbelFamily(DistributionFamily):
+    param_names = ("loc", "scale")
+
+    def __init__(self, block):
+        self.block = block
+        self.name = f"gumbel_{block}"
+
+    def fit(self, data):
+        # Maximum de vraisemblance : méthode de Newton sur le paramètre d'échelle, toutes séries à la fois
+        valid = ~np.isnan(data)
+        n = valid.sum(axis=1)
+        with np.errstate(all="ignore"):
+            x_min = np.where(valid, data, np.inf).min(axis=1)
+            x = np.where(valid, data - x_min[:, None], 0.0)
+            mean = x.sum(axis=1) / n
+            scale = np.sqrt(6 * (np.where(valid, x - mean[:, None], 0.0) ** 2).sum(axis=1) / n) / np.pi
+
+            for _ in range(GUMBEL_FIT_ITERATIONS):
+                w = np.where(valid, np.exp(-x / scale[:, None]), 0.0)
+                s0 = w.sum(axis=1)
+                m1 = (w * x).sum(axis=1) / s0
+                m2 = (w * x ** 2).sum(axis=1) / s0
+                g = scale - mean + m1
+                dg = 1 + (m2 - m1 ** 2) / scale ** 2
+                new_scale = scale - g / dg
+                scale = np.where(new_scale > 0, new_scale, scale / 2)
+
+            w = np.where(valid, np.exp(-x / scale[:, None]), 0.0)
+            loc = x_min - scale * np.log(w.sum(axis=1) / n)
+        ok = (n >= MIN_BLOCKS) & np.isfinite(loc) & np.isfinite(scale) & (scale > 0)
+        return np.column_stack([np.where(ok, loc, np.nan), np.where(ok, scale, np.nan)])
+
+    def frozen(self, params):
+        return stats.gumbel_r(loc=params[:, 0:1], scale=params[:, 1:2])
+
+
+class GEVFamily(DistributionFamily):
+    param_names = ("c", "loc", "scale")
+
+    def __init__(self, block):
+        self.block = block
+        self.name = f"gev_{block}"
+
+    def fit(self, data):
+        # Méthode des L-moments (Hosking, 1985) : explicite, donc vectorisée et robuste sur peu de blocs
+        data = np.sort(data, axis=1)
+        valid = ~np.isnan(data)
+        n = valid.sum(axis=1)
+        i = np.arange(data.shape[1])[None, :]
+        x = np.where(valid, data, 0.0)
+        with np.errstate(all="ignore"):
+            b0 = x.sum(axis=1) / n
+            b1 = (x * i / (n[:, None] - 1)).sum(axis=1) / n
+            b2 = (x * i * (i - 1) / ((n[:, None] - 1) * (n[:, None] - 2))).sum(axis=1) / n
+            l1, l2, l3 = b0, 2 * b1 - b0, 6 * b2 - 6 * b1 + b0
+
+            z = 2 / (3 + l3 / l2) - math.log(2) / math.log(3)
+            c = 7.8590 * z + 2.9554 * z ** 2
+            gamma = special.gamma(1 + c)
+            scale = l2 * c / ((1 - 2 ** -c) * gamma)
+            loc = l1 - scale * (1 - gamma) / c
+        ok = (n >= MIN_BLOCKS) & np.isfinite(c) & np.isfinite(loc) & (scale > 0)
+        return np.column_stack([np.where(ok, c, np.nan), np.where(ok, loc, np.nan), np.where(ok, scale, np.nan)])
+
+    def frozen(self, params):
+        return stats.genextreme(params[:, 0:1], loc=params[:, 1:2], scale=params[:, 2:3])
+
+
+# Familles disponibles, par nom (register_family pour en ajouter)
+FAMILIES = {}
+
+
+def register_family(family):
+    """
+    Ajoute une famille candidate (instance de DistributionFamily) au registre
+    """
+    FAMILIES[family.name] = family
+    return family
+
+
+for _family in [WeibullFamily(), LognormalFamily(),
+                GumbelFamily("annual"), GEVFamily("annual"), GumbelFamily("monthly"), GEVFamily("monthly")]:
+    register_family(_family)
+
+DEFAULT_FAMILIES = tuple(FAMILIES)
+
+
+def block_maxima(dates, wind_speeds, block):
+    """
+    Maxima par année ou par mois civil des blocs suffisamment complets
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    wind_speeds = np.asarray(wind_speeds, dtype=float)
+    keep = ~np.isnan(wind_speeds)
+    keys = dates[keep].astype("datetime64[Y]" if block == "annual" else "datetime64[M]")
+    values = wind_speeds[keep]
+    if not len(values):
+        return values
+
+    order = np.argsort(keys, kind="stable")
+    keys, values = keys[order], values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(keys)])
+    maxima = np.maximum.reduceat(values, starts)
+    return maxima[counts >= BLOCK_COMPLETENESS * DAYS_PER_BLOCK[block]]
+
+
+def _ks_statistic(sorted_data, cdf):
+    """
+    Statistique de Kolmogorov-Smirnov de chaque ligne (données triées, NaN en fin de ligne)
+    """
+    valid = ~np.isnan(sorted_data)
+    n = valid.sum(axis=1)[:, None]
+    i = np.arange(1, sorted_data.shape[1] + 1)[None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gap = np.maximum(i / n - cdf, cdf - (i - 1) / n)
+    return np.where(valid, gap, -np.inf).max(axis=1)
+
+
+def _fit_chunk(task):
+    """
+    Calibre toutes les familles sur un paquet de sites (exécuté dans un processus du pool)
+    """
+    families, series = task
+    daily = _stack_series([np.where(values >= 0, values, np.nan) for _, values in series])
+    n = (~np.isnan(daily)).sum(axis=1)
+
+    # Queue commune à toutes les familles : jours au-delà du quantile TAIL_QUANTILE de chaque site
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        tail_start = np.nanquantile(daily, TAIL_QUANTILE, axis=1)
+        tail = np.sort(np.where(daily > tail_start[:, None], daily, np.nan), axis=1)
+    tail = tail[:, :max(int((~np.isnan(tail)).sum(axis=1).max(initial=0)), 1)]
+    valid = ~np.isnan(tail)
+    n_tail = valid.sum(axis=1)
+
+    results = {}
+    for family in families:
+        if family.block:
+            data = _stack_series([block_maxima(dates, values, family.block) for dates, values in series])
+        else:
+            data = daily
+        params = family.fit(data)
+        fitted = ~np.isnan(params).any(axis=1)
+
+        # Vraisemblance et KS de la loi journalière équivalente conditionnée au dépassement du début
+        # de la queue, sur les mêmes jours pour toutes les familles
+        safe_params = np.where(fitted[:, None], params, 1.0)
+        with np.errstate(all="ignore"):
+            tail_sf = family.daily_sf(tail_start[:, None], safe_params)
+            log_likelihood = np.where(valid, family.daily_logpdf(tail, safe_params) - np.log(tail_sf), 0.0).sum(axis=1)
+            ks = _ks_statistic(tail, 1 - family.daily_sf(tail, safe_params) / tail_sf)
+        k = len(family.param_names)
+        fitted &= np.isfinite(log_likelihood)
+        log_likelihood = np.where(fitted, log_likelihood, np.nan)
+        results[family.name] = {
+            "params": params,
+            "n_days": n,
+            "n_tail": n_tail,
+            "log_likelihood": log_likelihood,
+            "aic": 2 * k - 2 * log_likelihood,
+            "bic": k * np.log(np.maximum(n_tail, 1)) - 2 * log_likelihood,
+            "ks": np.where(fitted, ks, np.nan)
+        }
+    return results
+
+
+def _as_series(data):
+    # DataFrame (date, wind_speed_max) ou couple (dates, vitesses)
+    if isinstance(data, tuple):
+        dates, wind_speeds = data
+    else:
+        dates, wind_speeds = data["date"], data["wind_speed_max"]
+    return np.asarray(dates, dtype="datetime64[D]"), np.asarray(wind_speeds, dtype=float)
+
+
+@metrics.timed("distributions.fit")
+def fit_distributions(series_by_site, families=DEFAULT_FAMILIES, max_workers=None, chunk_size=SITES_PER_CHUNK):
+    """
+    Calibre chaque famille candidate sur chaque site et calcule AIC, BIC et statistique KS.
+
+    `series_by_site` associe à chaque site son DataFrame (date, wind_speed_max) ou un couple
+    (dates, vitesses). Les critères sont calculés pour toutes les familles sur les mêmes jours, ceux
+    de la queue (au-delà du quantile TAIL_QUANTILE du site), avec la loi conditionnelle au dépassement
+    (loi journalière équivalente pour les maxima par blocs) afin d'être comparables.
+    Les paquets de sites sont répartis sur un pool de processus.
+    Retourne un DataFrame avec une ligne par site et par famille.
+    """
+    families = [FAMILIES[name] if isinstance(name, str) else name for name in families]
+    site_ids = list(series_by_site)
+    series = [_as_series(data) for data in series_by_site.values()]
+    tasks = [(families, series[start:start + chunk_size]) for start in range(0, len(series), chunk_size)]
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) <= 1:
+        chunks = list(map(_fit_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            chunks = list(executor.map(_fit_chunk, tasks))
+
+    tables = []
+    for family in families:
+        results = [chunk[family.name] for chunk in chunks]
+        params = np.full((len(site_ids), len(PARAM_COLUMNS)), np.nan)
+        if results:
+            family_params = np.concatenate([r["params"] for r in results])
+            params[:, :family_params.shape[1]] = family_params
+        table = pd.DataFrame({"site_id": site_ids, "family": family.name})
+        for i, col in enumerate(PARAM_COLUMNS):
+            table[col] = params[:, i]
+        for key in ["n_days", "n_tail", "log_likelihood", "aic", "bic", "ks"]:
+            table[key] = np.concatenate([r[key] for r in results]) if results else []
+        tables.append(table)
+
+    return pd.concat(tables, ignore_index=True)
+
+
+def select_best_models(fits, criterion="aic"):
+    """
+    Meilleure famille de chaque site selon le critère (aic, bic ou ks) ; une ligne par site
+    """
+    if criterion not in SELECTION_CRITERIA:
+        raise ValueError(f"Critère inconnu : {criterion} (attendu : {', '.join(SELECTION_CRITERIA)})")
+    ranked = fits.dropna(subset=[criterion]).sort_values(["site_id", criterion], kind="stable")
+    best = ranked.drop_duplicates(subset="site_id", keep="first")
+    # Ordre des sites d'origine
+    order = {site_id: i for i, site_id in enumerate(fits["site_id"].drop_duplicates())}
+    return best.sort_values("site_id", key=lambda s: s.map(order)).reset_index(drop=True)
+
+
+def exceedance_probability(families, params, threshold):
+    """
+    Probabilité journalière de dépassement du seuil pour des sites calibrés avec des familles différentes
+    (calcul vectorisé famille par famille)
+    """
+    families = np.asarray(families, dtype=object)
+    params = np.atleast_2d(np.asarray(params, dtype=float))
+    threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (len(families),))
+
+    probability = np.full(len(families), np.nan)
+    for name in set(families.tolist()):
+        # Sites sans loi calibrée : probabilité inconnue (NaN)
+        if name not in FAMILIES:
+            continue
+        rows = families == name
+        family = FAMILIES[name]
+        probability[rows] = family.exceedance_probability(threshold[rows], params[rows, :len(family.param_names)])
+    return probability
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    dates = np.arange("1995-01-01", "2025-01-01", dtype="datetime64[D]")
+    simulated = np.array(["weibull", "lognormal", "gumbel"])[np.arange(999) % 3]
+    sites = {}
+    for i, family in enumerate(simulated):
+        if family == "weibull":
+            wind_speeds = rng.uniform(15, 30) * rng.weibull(rng.uniform(1.8, 2.8), size=len(dates))
+        elif family == "lognormal":
+            wind_speeds = rng.lognormal(np.log(rng.uniform(15, 30)), rng.uniform(0.3, 0.5), size=len(dates))
+        else:
+            # Loi de Gumbel journalière : stable par maximum, les lois des maxima doivent la retrouver
+            wind_speeds = np.maximum(rng.gumbel(rng.uniform(15, 25), rng.uniform(4, 7), size=len(dates)), 0)
+        sites[f"S{i}"] = (dates, wind_speeds)
+
+    t0 = time.perf_counter()
+    fits = fit_distributions(sites)
+    best = select_best_models(fits)
+    print(f"{len(FAMILIES)} familles x {len(sites)} sites (30 ans) en {time.perf_counter() - t0:.1f} s")
+    print(pd.crosstab(pd.Series(simulated, name="simulée"), pd.Series(best["family"].to_numpy(), name="retenue")).to_string())
+    print(fits[fits["site_id"] == "S2"][["family", "aic", "bic", "ks"]])
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from datetime import date
+
+from src.lazy_imports import lazy_import
+from src.wind_cache import DEFAULT_CACHE_DIR
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+# Fichier partagé par le planificateur (écriture), l'application et l'API de cotation (lecture)
+DEFAULT_FIT_STORE_PATH = os.environ.get("WIND_FIT_STORE", os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "fits.json"))
+
+
+class FitStore:
+    """
+    Calibrages de Weibull précalculés, indexés par empreinte des données (data_hash),
+    et état de rafraîchissement de chaque site de la liste de suivi.
+
+    Le fichier JSON est réécrit de façon atomique ; les lecteurs le rechargent quand il change.
+    """
+
+    def __init__(self, path=DEFAULT_FIT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {"sites": {}, "fits": {}}
+        self._mtime = None
+
+    def _reload(self):
+        # Appelé sous le verrou : relit le fichier s'il a été modifié (par ce processus ou un autre)
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._data = json.load(f)
+            self._mtime = mtime
+
+    def params(self, key):
+        """
+        Paramètres (shape, scale) calibrés sur des données d'empreinte `key`, ou None
+        """
+        with self._lock:
+            self._reload()
+            fit = self._data["fits"].get(key)
+        return (fit["shape"], fit["scale"]) if fit else None
+
+    def site(self, site_id):
+        with self._lock:
+            self._reload()
+            record = self._data["sites"].get(str(site_id))
+        return dict(record) if record else None
+
+    def sites(self):
+        with self._lock:
+            self._reload()
+            return {site_id: dict(record) for site_id, record in self._data["sites"].items()}
+
+    def update_site(self, site_id, record, fit=None):
+        """
+        Enregistre l'état d'un site et, si fourni, le calibrage correspondant à son empreinte
+        """
+        with self._lock:
+            self._reload()
+            self._data["sites"][str(site_id)] = record
+            if fit is not None:
+                self._data["fits"][record["data_hash"]] = fit
+
+            # On ne garde que les calibrages encore utilisés par un site
+            used = {r.get("data_hash") for r in self._data["sites"].values()}
+            self._data["fits"] = {key: fit for key, fit in self._data["fits"].items() if key in used}
+
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+            self._mtime = os.stat(self.path).st_mtime_ns
+
+    def staleness(self, max_age_hours=24):
+        """
+        Fraîcheur de chaque site : âge du dernier rafraîchissement réussi et retard des données
+        """
+        now = time.time()
+        today = date.today()
+        rows = []
+        for site_id, record in self.sites().items():
+            refreshed_at = record.get("refreshed_at")
+            age_hours = (now - refreshed_at) / 3600 if refreshed_at else float("inf")
+            last_date = record.get("last_date")
+            rows.append({
+                "site_id": site_id,
+                "Statut": record.get("status"),
+                "Dernier rafraîchissement (h)": round(age_hours, 1),
+                "Dernière donnée": last_date,
+                "Retard des données (jours)": (today - date.fromisoformat(last_date)).days if last_date else None,
+                "Périmé": age_hours > max_age_hours,
+                "Erreur": record.get("error")
+            })
+        return pd.DataFrame(rows)
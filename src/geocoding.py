@@ -0,0 +1,231 @@
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from src import metrics
+from src.wind_cache import DEFAULT_CACHE_DIR
+
+# Base SQLite du cache de géocodage et, optionnellement, gazetier local des villes
+DEFAULT_DB_PATH = os.environ.get("WIND_GEOCODING_DB", os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "geocoding.sqlite"))
+DEFAULT_GAZETTEER_PATH = os.environ.get("WIND_GAZETTEER_PATH")
+
+# Délai minimal entre deux appels à Nominatim (politique d'usage du service public)
+NOMINATIM_MIN_DELAY = 1.0
+
+# Durée (s) pendant laquelle un lieu introuvable n'est pas redemandé à Nominatim : courte,
+# pour qu'un lieu ajouté depuis à OpenStreetMap finisse par être trouvé
+NEGATIVE_CACHE_TTL = 3600.0
+
+# Codes ISO 3166-1 alpha-2 des pays saisis par leur nom (français ou anglais, clés normalisées) ;
+# les codes à deux lettres sont acceptés tels quels
+COUNTRY_CODES = {
+    "france": "FR", "belgique": "BE", "belgium": "BE", "suisse": "CH", "switzerland": "CH",
+    "luxembourg": "LU", "monaco": "MC", "andorre": "AD", "andorra": "AD", "espagne": "ES", "spain": "ES",
+    "portugal": "PT", "italie": "IT", "italy": "IT", "allemagne": "DE", "germany": "DE",
+    "pays bas": "NL", "netherlands": "NL", "autriche": "AT", "austria": "AT",
+    "royaume uni": "GB", "united kingdom": "GB", "irlande": "IE", "ireland": "IE",
+    "danemark": "DK", "denmark": "DK", "norvege": "NO", "norway": "NO", "suede": "SE", "sweden": "SE",
+    "finlande": "FI", "finland": "FI", "pologne": "PL", "poland": "PL", "grece": "GR", "greece": "GR",
+    "maroc": "MA", "morocco": "MA", "algerie": "DZ", "algeria": "DZ", "tunisie": "TN", "tunisia": "TN",
+    "canada": "CA", "etats unis": "US", "united states": "US", "usa": "US",
+}
+
+_SCHEMA = """
+-- Un lieu introuvable est enregistré sans coordonnées (cache négatif, voir NEGATIVE_CACHE_TTL)
+CREATE TABLE IF NOT EXISTS geocode_cache (
+    query TEXT PRIMARY KEY,
+    latitude REAL,
+    longitude REAL,
+    address TEXT,
+    created_at REAL
+);
+CREATE TABLE IF NOT EXISTS gazetteer (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    country TEXT,  -- code ISO 3166-1 alpha-2
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    population INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS gazetteer_key ON gazetteer (key);
+"""
+
+
+def normalize_query(query):
+    """
+    Clé normalisée d'une recherche : minuscules, sans accents ni ponctuation superflue
+    """
+    text = unicodedata.normalize("NFKD", query)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[^\w,]+", " ", text)
+    parts = [" ".join(part.split()) for part in text.split(",")]
+    return ", ".join(part for part in parts if part)
+
+
+def country_code(country):
+    """
+    Code ISO 3166-1 alpha-2 d'un pays donné par son code ou son nom, None s'il est inconnu
+    """
+    key = normalize_query(country or "")
+    if len(key) == 2 and key.isalpha():
+        return key.upper()
+    return COUNTRY_CODES.get(key)
+
+
+class GeocodingCache:
+    """
+    Cache persistant des géocodages et gazetier local avec recherche par préfixe
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, gazetteer_path=DEFAULT_GAZETTEER_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._last_call = 0.0
+        with self._lock:
+            self._conn.executescript(_SCHEMA)
+
+        if gazetteer_path and os.path.exists(gazetteer_path) and self.gazetteer_size() == 0:
+            self.load_gazetteer(gazetteer_path)
+
+    def gazetteer_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM gazetteer").fetchone()[0]
+
+    def load_gazetteer(self, path):
+        """
+        Charge un gazetier : CSV (colonnes name, country, latitude, longitude, population)
+        ou fichier GeoNames (ex: cities15000.txt, séparé par des tabulations).
+        Les pays sont enregistrés sous leur code ISO alpha-2 (noms de COUNTRY_CODES convertis).
+        """
+        rows = []
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".txt"):
+                for record in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                    name, country = record[1], record[8]
+                    rows.append((normalize_query(name), name, country_code(country) or country, float(record[4]),
+                                 float(record[5]), int(record[14] or 0)))
+            else:
+                for record in csv.DictReader(f):
+                    name = record["name"]
+                    country = record.get("country", "")
+                    rows.append((normalize_query(name), name, country_code(country) or country, float(record["latitude"]),
+                                 float(record["longitude"]), int(record.get("population") or 0)))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO gazetteer (key, name, country, latitude, longitude, population) VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def lookup(self, query):
+        """
+        Cherche une localisation dans le cache puis dans le gazetier, sans appel réseau
+        (les entrées du cache négatif sont ignorées ici : voir geocode). Si la recherche précise un
+        pays, seule une ville de ce pays est retenue : sinon None, et geocode interroge Nominatim.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT latitude, longitude, address FROM geocode_cache WHERE query = ? AND latitude IS NOT NULL",
+                (key,)).fetchone()
+            if row:
+                return {"latitude": row[0], "longitude": row[1], "address": row[2], "source": "cache"}
+
+            # "Bordeaux, France" : nom de la ville, puis pays pour départager les homonymes
+            name, _, country = key.partition(", ")
+            rows = self._conn.execute(
+                "SELECT name, country, latitude, longitude FROM gazetteer WHERE key = ? ORDER BY population DESC",
+                (name,)).fetchall()
+
+        if not rows:
+            return None
+        if not country:
+            best = rows[0]
+        else:
+            # Pays ou précision inconnus du gazetier (« Paris, Texas ») : la recherche passe à Nominatim
+            code = country_code(country)
+            best = next((r for r in rows if code and country_code(r[1]) == code), None)
+            if best is None:
+                return None
+        return {"latitude": best[2], "longitude": best[3], "address": f"{best[0]}, {best[1]}", "source": "gazetier"}
+
+    def suggest(self, prefix, limit=8):
+        """
+        Suggestions de villes commençant par `prefix` (recherche par plage sur l'index)
+        """
+        key = normalize_query(prefix).partition(", ")[0]
+        if not key:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, country, latitude, longitude FROM gazetteer WHERE key >= ? AND key < ? "
+                "ORDER BY population DESC LIMIT ?", (key, key + "\uffff", limit)).fetchall()
+        return [{"label": f"{name}, {country}", "latitude": latitude, "longitude": longitude}
+                for name, country, latitude, longitude in rows]
+
+    def recently_missing(self, query):
+        """
+        Vrai si Nominatim n'a pas trouvé ce lieu il y a moins de NEGATIVE_CACHE_TTL secondes
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at FROM geocode_cache WHERE query = ? AND latitude IS NULL",
+                (normalize_query(query),)).fetchone()
+        return row is not None and time.time() - row[0] < NEGATIVE_CACHE_TTL
+
+    def store(self, query, latitude, longitude, address):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO geocode_cache (query, latitude, longitude, address, created_at) VALUES (?, ?, ?, ?, ?)",
+                (normalize_query(query), latitude, longitude, address, time.time()))
+
+    def geocode(self, query, geocoder=None):
+        """
+        Géocode une recherche : cache et gazetier d'abord, Nominatim seulement en dernier recours.
+        Retourne un dict (latitude, longitude, address, source) ou None si le lieu est introuvable ;
+        un lieu introuvable n'est pas redemandé avant NEGATIVE_CACHE_TTL secondes.
+        """
+        location = self.lookup(query)
+        if location:
+            metrics.increment("geocoding.hit")
+            return location
+        if self.recently_missing(query):
+            metrics.increment("geocoding.negative_hit")
+            return None
+
+        metrics.increment("geocoding.miss")
+        if geocoder is None:
+            from geopy.geocoders import Nominatim
+            geocoder = Nominatim(user_agent="wind_risk_pricer")
+
+        # Respecter le délai minimal entre deux appels au service public : le créneau est réservé sous
+        # le verrou, l'attente se fait hors verrou pour ne pas bloquer lookup et suggest des autres sessions
+        with self._lock:
+            call_at = max(time.monotonic(), self._last_call + NOMINATIM_MIN_DELAY)
+            self._last_call = call_at
+        delay = call_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+        with metrics.span("geocoding.nominatim", query=query):
+            result = geocoder.geocode(query)
+        if result is None:
+            self.store(query, None, None, None)
+            return None
+
+        self.store(query, result.latitude, result.longitude, result.address)
+        return {"latitude": result.latitude, "longitude": result.longitude, "address": result.address, "source": "nominatim"}
+
+
+# Chargement d'un gazetier
+if __name__ == "__main__":
+    import sys
+
+    cache = GeocodingCache()
+    if len(sys.argv) > 1:
+        print(f"{cache.load_gazetteer(sys.argv[1])} villes chargées dans {DEFAULT_DB_PATH}")
+    print(cache.suggest("bord"))
@@ -0,0 +1,43 @@
+import importlib
+import threading
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """
+    Module chargé au premier accès à l'un de ses attributs
+    """
+
+    def __getattr__(self, attr):
+        # importlib prend le verrou d'import du module : sûr même si plusieurs threads y accèdent
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """
+    Retourne un module qui ne sera importé qu'à la première utilisation
+    (ex: `pd = lazy_import("pandas")` puis `pd.DataFrame(...)`)
+    """
+    return _LazyModule(name)
+
+
+def preload_in_background(module_names, tasks=()):
+    """
+    Importe les modules lourds puis exécute les tâches de préchauffage dans un thread,
+    pour que le premier calcul n'ait pas à attendre ces imports
+    """
+    def run():
+        for name in module_names:
+            importlib.import_module(name)
+        for task in tasks:
+            try:
+                task()
+            except Exception:
+                # Le préchauffage est facultatif : une erreur ici ne doit pas gêner l'application
+                pass
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,165 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Activation par variable d'environnement (WIND_METRICS=1) ou par enable()
+_enabled = os.environ.get("WIND_METRICS", "0") not in ("", "0", "false")
+
+# Nombre maximal de mesures conservées (les plus anciennes sont oubliées)
+MAX_EVENTS = 10000
+
+_events = deque(maxlen=MAX_EVENTS)
+_counters = {}
+_lock = threading.Lock()
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _events.clear()
+        _counters.clear()
+
+
+class _NoopSpan:
+    """
+    Span utilisé quand l'instrumentation est désactivée : ne fait rien
+    """
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        """
+        Ajoute des attributs à la mesure (taille de la réponse, nombre de points...)
+        """
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event = {
+            "name": self.name,
+            "duration_ms": 1000 * (time.perf_counter() - self.start),
+            "timestamp": time.time(),
+            "error": exc_type.__name__ if exc_type else None,
+            **self.attributes
+        }
+        with _lock:
+            _events.append(event)
+        return False
+
+
+def span(name, **attributes):
+    """
+    Mesure la durée d'un bloc : `with span("fetch", site=...) as s: ...; s.set(bytes=...)`
+    """
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, attributes)
+
+
+def timed(name):
+    """
+    Décorateur : mesure la durée de chaque appel de la fonction
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def increment(name, value=1):
+    """
+    Incrémente un compteur (ex: succès et échecs du cache)
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def summary():
+    """
+    Statistiques par étape : nombre d'appels, durées totale, moyenne et maximale (ms)
+    """
+    stats = {}
+    for event in events():
+        stat = stats.setdefault(event["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stat["count"] += 1
+        stat["total_ms"] += event["duration_ms"]
+        stat["max_ms"] = max(stat["max_ms"], event["duration_ms"])
+    for stat in stats.values():
+        stat["mean_ms"] = stat["total_ms"] / stat["count"]
+    return stats
+
+
+def to_jsonl():
+    """
+    Export des mesures au format JSON lines (une mesure par ligne)
+    """
+    lines = [json.dumps(event, ensure_ascii=False, default=str) for event in events()]
+    lines += [json.dumps({"counter": name, "value": value}) for name, value in counters().items()]
+    return "\n".join(lines) + "\n"
+
+
+def to_prometheus():
+    """
+    Export au format texte Prometheus
+    """
+    lines = [
+        "# HELP wind_stage_duration_seconds Durée cumulée de chaque étape",
+        "# TYPE wind_stage_duration_seconds summary"
+    ]
+    for name, stat in sorted(summary().items()):
+        lines.append(f'wind_stage_duration_seconds_sum{{stage="{name}"}} {stat["total_ms"] / 1000:.6f}')
+        lines.append(f'wind_stage_duration_seconds_count{{stage="{name}"}} {stat["count"]}')
+
+    lines += ["# HELP wind_events_total Compteurs (cache, erreurs...)", "# TYPE wind_events_total counter"]
+    for name, value in sorted(counters().items()):
+        lines.append(f'wind_events_total{{name="{name}"}} {value}')
+    return "\n".join(lines) + "\n"
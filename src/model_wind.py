@@ -1,36 +1,475 @@
-from scipy.stats import weibull_min
+from collections import OrderedDict
+import hashlib
+import threading
+
 import numpy as np
 
-# 1. Calibration du modèle de Weibull
-def fit_weibull_distribution(df):
+from src import metrics
+from src.lazy_imports import lazy_import
+
+# scipy.stats est long à importer : chargé au premier calibrage
+stats = lazy_import("scipy.stats")
+
+# Nombre maximal de modèles calibrés gardés en mémoire
+MODEL_CACHE_SIZE = 32
+
+# Nombre de quantiles précalculés pour le QQ plot (indépendant de la taille de l'historique)
+QQ_QUANTILES = 200
+
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+
+
+def clean_wind_speeds(df):
     """
-    Ajuste une distribution de Weibull aux données de vitesses de vent
+    Extrait les vitesses de vent exploitables (sans valeurs manquantes ni négatives)
     """
-    # Extraire les vitesses de vent
-    wind_speeds = df['wind_speed_max'].values
+    wind_speeds = np.asarray(df['wind_speed_max'], dtype=float)
 
     # Filtrer les vitesses de vent pour éviter les valeurs négatives  ainsi que les valeurs manquantes
     wind_speeds = wind_speeds[~np.isnan(wind_speeds)] 
     wind_speeds = wind_speeds[wind_speeds >= 0]
-    
-    # Supprimer les valeurs NaN
+    return wind_speeds
 
-    
-    # Estimer les paramètres de la distribution de Weibull
-    shape, loc, scale = weibull_min.fit(wind_speeds, floc=0)  # On fixe loc à 0 pour les vitesses de vent car elles ne peuvent pas être négatives
-    
-    return shape, loc, scale
+
+def data_hash(df):
+    """
+    Empreinte des vitesses de vent, utilisée comme clé du cache des modèles
+    """
+    wind_speeds = np.ascontiguousarray(df['wind_speed_max'], dtype=float)
+    return hashlib.sha1(wind_speeds.tobytes()).hexdigest()
+
+
+class WeibullModel:
+    """
+    Modèle de Weibull calibré une seule fois et partagé par le pricer et les graphiques
+    """
+
+    def __init__(self, shape, loc, scale, sample):
+        self.shape = shape
+        self.loc = loc
+        self.scale = scale
+
+        # Échantillon nettoyé trié
+        self.sample = np.sort(sample)
+
+        # QQ plot : l'observation de rang i (sur n) est comparée au quantile théorique
+        # 0.01 + 0.98 * i / (n - 1) ; on en garde un nombre fixe de points sur la même courbe
+        positions = np.linspace(0, 1, min(QQ_QUANTILES, len(self.sample)))
+        self.empirical_quantiles = np.quantile(self.sample, positions) if len(self.sample) else positions
+        self.theoretical_quantiles = stats.weibull_min.ppf(0.01 + 0.98 * positions, shape, loc=loc, scale=scale)
+
+    @classmethod
+    def fit(cls, wind_speeds):
+        # On fixe loc à 0 pour les vitesses de vent car elles ne peuvent pas être négatives
+        shape, loc, scale = stats.weibull_min.fit(wind_speeds, floc=0)
+        return cls(shape, loc, scale, wind_speeds)
+
+    @property
+    def params(self):
+        return self.shape, self.loc, self.scale
+
+    def pdf(self, x):
+        return stats.weibull_min.pdf(x, self.shape, loc=self.loc, scale=self.scale)
+
+    def exceedance_probability(self, threshold):
+        return 1 - stats.weibull_min.cdf(threshold, self.shape, loc=self.loc, scale=self.scale)
+
+
+def get_weibull_model(df, lookup=None):
+    """
+    Retourne le modèle de Weibull calibré sur df, en réutilisant le cache LRU si les données sont identiques.
+
+    `lookup` (optionnel) associe une empreinte de données à des paramètres (shape, scale) déjà
+    calibrés ailleurs, par exemple FitStore.params : le calibrage est alors évité.
+    """
+    key = data_hash(df)
+    with _model_cache_lock:
+        if key in _model_cache:
+            _model_cache.move_to_end(key)
+            metrics.increment("model_cache.hit")
+            return _model_cache[key]
+
+    wind_speeds = clean_wind_speeds(df)
+    params = lookup(key) if lookup is not None else None
+    if params is not None:
+        metrics.increment("model_cache.precomputed")
+        model = WeibullModel(params[0], 0, params[1], wind_speeds)
+    else:
+        metrics.increment("model_cache.miss")
+        with metrics.span("weibull.fit", n=len(wind_speeds)):
+            model = WeibullModel.fit(wind_speeds)
+    with _model_cache_lock:
+        _model_cache[key] = model
+        if len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return model
+
+
+# 1. Calibration du modèle de Weibull
+def fit_weibull_distribution(df):
+    """
+    Ajuste une distribution de Weibull aux données de vitesses de vent
+    """
+    return get_weibull_model(df).params
+
+
+# Nombre d'itérations de Newton du calibrage par lots, et taille des blocs de séries traités ensemble
+BATCH_FIT_ITERATIONS = 10
+BATCH_FIT_BLOCK_SIZE = 1024
+
+
+def _stack_series(series):
+    """
+    Empile des séries (tableau 2D complété par des NaN, ou liste de séries de longueurs différentes)
+    """
+    if isinstance(series, np.ndarray) and series.ndim == 2:
+        data = series.astype(float, copy=True)
+    else:
+        series = [np.asarray(x, dtype=float).ravel() for x in series]
+        data = np.full((len(series), max((len(x) for x in series), default=0)), np.nan)
+        for i, x in enumerate(series):
+            data[i, :len(x)] = x
+
+    # Même nettoyage que clean_wind_speeds : les valeurs négatives sont ignorées
+    data[data < 0] = np.nan
+    return data
+
+
+def _newton_weibull_shape(data, initial_shape, n_iter, tol):
+    """
+    Résout l'équation du maximum de vraisemblance du paramètre de forme (loc = 0)
+    par itérations de Newton vectorisées sur un bloc de séries
+    """
+    valid = data > 0
+    n = valid.sum(axis=1)
+
+    # Normaliser par le maximum de chaque série pour éviter les dépassements numériques
+    with np.errstate(all="ignore"):
+        x_max = np.where(valid, data, 0.0).max(axis=1)
+        log_x = np.where(valid, np.log(data / x_max[:, None]), 0.0)
+        mean_log = log_x.sum(axis=1) / n
+
+        # Départ à chaud : paramètre fourni, sinon approximation de Gumbel sur ln(x)
+        if initial_shape is None:
+            std_log = np.sqrt((np.where(valid, log_x - mean_log[:, None], 0.0) ** 2).sum(axis=1) / n)
+            shape = 1.2825 / std_log
+        else:
+            shape = np.asarray(initial_shape, dtype=float).copy()
+
+        step = np.full(len(data), np.inf)
+        for _ in range(n_iter):
+            x_k = np.where(valid, np.exp(shape[:, None] * log_x), 0.0)
+            s0 = x_k.sum(axis=1)
+            s1 = (x_k * log_x).sum(axis=1)
+            s2 = (x_k * log_x ** 2).sum(axis=1)
+
+            ratio = s1 / s0
+            g = ratio - 1 / shape - mean_log
+            dg = s2 / s0 - ratio ** 2 + 1 / shape ** 2
+            step = g / dg
+            new_shape = shape - step
+            shape = np.where(new_shape > 0, new_shape, shape / 2)
+
+        x_k = np.where(valid, np.exp(shape[:, None] * log_x), 0.0)
+        scale = x_max * (x_k.sum(axis=1) / n) ** (1 / shape)
+
+    # Les séries avec des zéros n'ont pas de solution de cette forme : on les confie à scipy
+    has_zero = (data == 0).any(axis=1)
+    converged = np.isfinite(shape) & np.isfinite(scale) & (np.abs(step) <= tol * shape) & (n >= 2) & ~has_zero
+    return shape, scale, converged
+
+
+@metrics.timed("weibull.fit_batch")
+def fit_weibull_batch(series, initial_shape=None, n_iter=BATCH_FIT_ITERATIONS, tol=1e-8):
+    """
+    Ajuste une distribution de Weibull (loc = 0) à plusieurs séries de vitesses de vent à la fois.
+
+    `series` est un tableau 2D (une série par ligne, complétée par des NaN) ou une liste
+    de séries de longueurs différentes. Retourne les tableaux des paramètres shape et scale.
+    Les séries qui ne convergent pas sont recalibrées avec scipy.
+    """
+    data = _stack_series(series)
+    shapes = np.full(len(data), np.nan)
+    scales = np.full(len(data), np.nan)
+    if initial_shape is not None:
+        initial_shape = np.broadcast_to(np.asarray(initial_shape, dtype=float), (len(data),))
+
+    for start in range(0, len(data), BATCH_FIT_BLOCK_SIZE):
+        block = slice(start, start + BATCH_FIT_BLOCK_SIZE)
+        warm_start = None if initial_shape is None else initial_shape[block]
+        shape, scale, converged = _newton_weibull_shape(data[block], warm_start, n_iter, tol)
+        shapes[block] = shape
+        scales[block] = scale
+
+        # Repli sur scipy pour les séries non convergées
+        for i in np.flatnonzero(~converged):
+            wind_speeds = data[start + i][~np.isnan(data[start + i])]
+            if len(wind_speeds) < 2:
+                shapes[start + i] = scales[start + i] = np.nan
+                continue
+            shapes[start + i], _, scales[start + i] = stats.weibull_min.fit(wind_speeds, floc=0)
+
+    return shapes, scales
+
+
+def check_weibull_batch_fit(series, rtol=1e-4):
+    """
+    Vérifie que fit_weibull_batch donne les mêmes paramètres que scipy (à la tolérance près)
+    """
+    shapes, scales = fit_weibull_batch(series)
+    data = _stack_series(series)
+
+    max_error = 0.0
+    for i, row in enumerate(data):
+        wind_speeds = row[~np.isnan(row)]
+        if len(wind_speeds) < 2:
+            continue
+        shape, _, scale = stats.weibull_min.fit(wind_speeds, floc=0)
+        max_error = max(max_error, abs(shapes[i] / shape - 1), abs(scales[i] / scale - 1))
+
+    return max_error <= rtol, max_error
+
+
+# Calibrage incrémental : nombre de moments conservés, itérations de Newton et fréquence du contrôle complet
+INCREMENTAL_MOMENTS = 12
+INCREMENTAL_MAX_ITERATIONS = 8
+REFIT_CHECK_INTERVAL = 30
+# Ancrage provisoire tant que l'historique est trop court pour un premier calibrage
+INCREMENTAL_DEFAULT_SHAPE = 2.0
+
+
+class IncrementalWeibullFit:
+    """
+    Calibrage de Weibull (loc = 0) mis à jour avec les seules nouvelles observations.
+
+    Les statistiques suffisantes M_p = somme de y^k0 * ln(y)^p (y = x / c, p = 0..INCREMENTAL_MOMENTS)
+    sont conservées autour d'un paramètre de forme d'ancrage k0 ; les sommes nécessaires à la
+    méthode de Newton pour une forme k proche de k0 s'en déduisent par développement de Taylor de
+    y^(k - k0). Une mise à jour coûte donc de l'ordre de la taille des nouvelles données, et quelques
+    itérations suffisent en partant de la solution précédente. Si la forme s'éloigne trop de l'ancrage,
+    les moments sont réexprimés autour de la nouvelle forme par le même développement.
+
+    Seules ces statistiques sont gardées (pas les observations) : to_dict / from_dict permettent de
+    reprendre le calibrage d'un passage à l'autre. Les jours de vent nul (calme, sous la résolution
+    du capteur) sont comptés à part dans n_zero et exclus de la vraisemblance, comme dans
+    fit_weibull_batch : le calibrage porte sur les n jours de vent non nul.
+
+    L'historique initial est un DataFrame / WindSeries (date, wind_speed_max) ou des vitesses
+    accompagnées de `dates` : le dernier jour connu sert ensuite à extend. Un historique sans dates
+    ne peut être complété que par update. Tous les `refit_every` ajouts, extend compare le résultat à
+    un calibrage complet si le DataFrame reçu couvre tout l'historique (sinon : appeler check).
+    """
+
+    def __init__(self, wind_speeds=(), dates=None, refit_every=REFIT_CHECK_INTERVAL, rtol=1e-6, tol=1e-10):
+        if hasattr(wind_speeds, "columns"):
+            dates, wind_speeds = wind_speeds["date"], wind_speeds["wind_speed_max"]
+        wind_speeds = np.asarray(wind_speeds, dtype=float).ravel()
+        self.refit_every = refit_every
+        self.rtol = rtol
+        self.tol = tol
+        self.shape = np.nan
+        self.scale = np.nan
+        self.first_date = None
+        self.last_date = None
+        # Historique initial sans dates : extend ne saurait pas quels jours sont déjà comptés
+        self.undated = dates is None and len(wind_speeds) > 0
+        if dates is not None:
+            dates = np.asarray(dates, dtype="datetime64[D]")
+            if dates.shape != wind_speeds.shape:
+                raise ValueError(f"Dates ({dates.shape}) et vitesses ({wind_speeds.shape}) de tailles différentes")
+            if len(dates):
+                self.first_date, self.last_date = dates.min(), dates.max()
+        self.updates_since_check = 0
+        self.last_check_error = None
+        self._reset_moments(None, None)
+        self.update(wind_speeds)
+
+    @property
+    def params(self):
+        return self.shape, 0, self.scale
+
+    def to_dict(self):
+        """
+        État du calibrage (statistiques suffisantes et solution courante), sérialisable en JSON
+        """
+        return {
+            "shape": self.shape, "scale": self.scale,
+            "anchor_shape": self.anchor_shape, "reference": self.reference,
+            "moments": self.moments.tolist(), "sum_log": self.sum_log, "max_abs_log": self.max_abs_log,
+            "n": self.n, "n_zero": self.n_zero,
+            "first_date": None if self.first_date is None else str(self.first_date),
+            "last_date": None if self.last_date is None else str(self.last_date),
+            "undated": self.undated, "updates_since_check": self.updates_since_check,
+            "last_check_error": self.last_check_error
+        }
+
+    @classmethod
+    def from_dict(cls, state, refit_every=REFIT_CHECK_INTERVAL, rtol=1e-6, tol=1e-10):
+        """
+        Reprend un calibrage enregistré avec to_dict
+        """
+        if len(state["moments"]) != INCREMENTAL_MOMENTS + 1:
+            raise ValueError(f"État incompatible : {len(state['moments'])} moments (attendus : {INCREMENTAL_MOMENTS + 1})")
+        fit = cls(refit_every=refit_every, rtol=rtol, tol=tol)
+        fit.shape, fit.scale = float(state["shape"]), float(state["scale"])
+        fit.anchor_shape, fit.reference = state["anchor_shape"], state["reference"]
+        fit.moments = np.asarray(state["moments"], dtype=float)
+        fit.sum_log, fit.max_abs_log = float(state["sum_log"]), float(state["max_abs_log"])
+        fit.n, fit.n_zero = int(state["n"]), int(state["n_zero"])
+        fit.first_date = None if state["first_date"] is None else np.datetime64(state["first_date"], "D")
+        fit.last_date = None if state["last_date"] is None else np.datetime64(state["last_date"], "D")
+        fit.undated = bool(state["undated"])
+        fit.updates_since_check = int(state["updates_since_check"])
+        fit.last_check_error = state.get("last_check_error")
+        return fit
+
+    def _reset_moments(self, anchor_shape, reference):
+        self.anchor_shape = anchor_shape
+        self.reference = reference
+        self.moments = np.zeros(INCREMENTAL_MOMENTS + 1)
+        self.sum_log = 0.0
+        self.max_abs_log = 0.0
+        self.n = 0
+        self.n_zero = 0
+
+    def _accumulate(self, wind_speeds):
+        # Jours de vent nul : comptés à part, hors des termes logarithmiques
+        self.n_zero += int(np.count_nonzero(wind_speeds == 0))
+        log_y = np.log(wind_speeds[wind_speeds > 0] / self.reference)
+        if not len(log_y):
+            return
+        # M_p += somme de y^k0 * ln(y)^p, par produits successifs
+        term = np.exp(self.anchor_shape * log_y)
+        for p in range(INCREMENTAL_MOMENTS + 1):
+            self.moments[p] += term.sum()
+            term = term * log_y
+        self.n += len(log_y)
+        self.sum_log += log_y.sum()
+        self.max_abs_log = max(self.max_abs_log, float(np.abs(log_y).max()))
+
+    def _sums(self, shape, orders=3):
+        # Sommes de y^k * ln(y)^j (j < orders) par développement de Taylor autour de k0
+        delta = shape - self.anchor_shape
+        coefficients = np.ones(INCREMENTAL_MOMENTS + 1)
+        for m in range(1, INCREMENTAL_MOMENTS + 1):
+            coefficients[m] = coefficients[m - 1] * delta / m
+        return [coefficients[:INCREMENTAL_MOMENTS + 1 - j] @ self.moments[j:] for j in range(orders)]
+
+    def _reanchor(self, shape):
+        # Nouvel ancrage sans les observations : moments réexprimés autour de la nouvelle forme
+        self.moments = np.array(self._sums(shape, orders=INCREMENTAL_MOMENTS + 1))
+        self.anchor_shape = float(shape)
+        metrics.increment("weibull.incremental.reanchor")
+
+    def update(self, wind_speeds):
+        """
+        Ajoute de nouvelles observations et met à jour (shape, scale) en partant de la solution précédente
+        """
+        wind_speeds = np.asarray(wind_speeds, dtype=float).ravel()
+        wind_speeds = wind_speeds[~np.isnan(wind_speeds) & (wind_speeds >= 0)]
+        if not len(wind_speeds):
+            return self.shape, self.scale
+
+        if self.anchor_shape is None:
+            # Premières observations : calibrage complet, qui fixe l'ancrage
+            return self.full_refit(wind_speeds)
+        self._accumulate(wind_speeds)
+        if self.n < 2:
+            return self.shape, self.scale
+
+        n = self.n
+        shape = self.shape if np.isfinite(self.shape) else self.anchor_shape
+        for _ in range(INCREMENTAL_MAX_ITERATIONS):
+            # Au-delà de ce rayon, la troncature du développement n'est plus négligeable
+            if abs(shape - self.anchor_shape) * self.max_abs_log > 1:
+                self._reanchor(shape)
+            s0, s1, s2 = self._sums(shape)
+            ratio = s1 / s0
+            g = ratio - 1 / shape - self.sum_log / n
+            dg = s2 / s0 - ratio ** 2 + 1 / shape ** 2
+            step = g / dg
+            shape = shape - step if shape - step > 0 else shape / 2
+            if abs(step) <= self.tol * shape:
+                break
+
+        self.shape = float(shape)
+        self.scale = float(self.reference * (self._sums(shape)[0] / n) ** (1 / shape))
+        metrics.increment("weibull.incremental.update")
+        self.updates_since_check += 1
+        return self.shape, self.scale
+
+    def extend(self, df):
+        """
+        Met à jour le calibrage avec les jours de df postérieurs au dernier jour déjà pris en compte.
+        Si df couvre tout l'historique, il sert aussi au contrôle complet périodique.
+        """
+        if self.undated:
+            raise ValueError("Historique initial sans dates : utiliser update, ou fournir les dates au constructeur")
+        dates = np.asarray(df["date"], dtype="datetime64[D]")
+        wind_speeds = np.asarray(df["wind_speed_max"], dtype=float)
+        new = dates > self.last_date if self.last_date is not None else np.ones(len(dates), dtype=bool)
+        if new.any():
+            self.update(wind_speeds[new])
+            self.last_date = dates[new].max()
+            if self.first_date is None:
+                self.first_date = dates[new].min()
+
+        covers_history = len(dates) and self.first_date is not None and dates.min() <= self.first_date
+        if self.refit_every and self.updates_since_check >= self.refit_every and covers_history:
+            self.check(wind_speeds[dates <= self.last_date])
+            self.first_date = dates.min()
+        return self.shape, self.scale
+
+    def full_refit(self, wind_speeds):
+        """
+        Calibrage complet sur tout l'historique `wind_speeds`, qui remplace les statistiques
+        """
+        wind_speeds = np.asarray(wind_speeds, dtype=float).ravel()
+        wind_speeds = wind_speeds[~np.isnan(wind_speeds) & (wind_speeds >= 0)]
+        positive = wind_speeds[wind_speeds > 0]
+        shapes, scales = fit_weibull_batch([positive]) if len(positive) >= 2 else ([np.nan], [np.nan])
+        self.shape, self.scale = float(shapes[0]), float(scales[0])
+        self.updates_since_check = 0
+
+        # Historique trop court pour un calibrage : ancrage provisoire, la forme sera trouvée par update
+        fitted = np.isfinite(self.shape) and self.shape > 0 and np.isfinite(self.scale)
+        anchor_shape = self.shape if fitted else INCREMENTAL_DEFAULT_SHAPE
+        reference = self.scale if fitted else (float(positive.max()) if len(positive) else 1.0)
+        self._reset_moments(anchor_shape, reference)
+        self._accumulate(wind_speeds)
+        return self.shape, self.scale
+
+    def check(self, wind_speeds):
+        """
+        Compare la solution incrémentale à un calibrage complet sur tout l'historique `wind_speeds`,
+        qui remplace les statistiques ; signale une dérive si l'écart dépasse rtol
+        """
+        shape, scale = self.shape, self.scale
+        full_shape, full_scale = self.full_refit(wind_speeds)
+        self.last_check_error = max(abs(shape / full_shape - 1), abs(scale / full_scale - 1))
+        metrics.increment("weibull.incremental.check")
+        if self.last_check_error > self.rtol:
+            metrics.increment("weibull.incremental.drift")
+        return self.last_check_error
+
+    def to_model(self, wind_speeds):
+        """
+        WeibullModel correspondant (pour le pricer et les graphiques), avec l'historique `wind_speeds`
+        """
+        return WeibullModel(self.shape, 0, self.scale, clean_wind_speeds({"wind_speed_max": wind_speeds}))
 
 
 # 2. Calcul de probabilité de dépassement d'un seuil de vent
 def calculate_exceedance_probability(df, threshold):
     """
-    Calcule la probabilité que la vitesse de vent maximale dépasse un certain seuil
+    Calcule la probabilité que la vitesse de vent maximale dépasse un certain seuil.
+    Accepte les données de vent ou un WeibullModel déjà calibré.
     """
-    shape, loc, scale = fit_weibull_distribution(df)
+    model = df if isinstance(df, WeibullModel) else get_weibull_model(df)
     
     # Calculer la probabilité de dépassement du seuil
-    exceedance_probability = 1 - weibull_min.cdf(threshold, shape, loc=loc, scale=scale)
+    exceedance_probability = model.exceedance_probability(threshold)
     
     return exceedance_probability
 
@@ -49,4 +488,31 @@ if __name__ == "__main__":
     # Calcul de la probabilité de dépassement d'un seuil de vent
     threshold = 35 #euil en km/h
     exceedance_prob = calculate_exceedance_probability(df, threshold)
-    print(f"Probabilité que la vitesse de vent maximale dépasse {threshold} km/h : {exceedance_prob:.4f}")
\ No newline at end of file
+    print(f"Probabilité que la vitesse de vent maximale dépasse {threshold} km/h : {exceedance_prob:.4f}")
+
+    # Calibrage par lots sur des séries synthétiques de longueurs différentes
+    rng = np.random.default_rng(0)
+    series = [rng.uniform(10, 30) * rng.weibull(rng.uniform(1.5, 3.0), size=rng.integers(365, 1461)) for _ in range(200)]
+    ok, max_error = check_weibull_batch_fit(series)
+    print(f"Calibrage par lots conforme à scipy : {ok} (écart relatif max = {max_error:.2e})")
+
+    # Recalibrage quotidien incrémental sur 30 ans d'historique
+    import json
+    import time
+
+    # Vitesses arrondies au km/h comme les maxima journaliers réels : quelques jours de calme (0 km/h)
+    history = np.round(22.0 * rng.weibull(2.3, size=30 * 365))
+    incremental = IncrementalWeibullFit(history, refit_every=0)
+    new_days = np.round(25.0 * rng.weibull(2.0, size=365))
+    t0 = time.perf_counter()
+    for day in new_days:
+        # État relu à chaque jour, comme d'un passage quotidien au suivant
+        incremental = IncrementalWeibullFit.from_dict(json.loads(json.dumps(incremental.to_dict())), refit_every=0)
+        incremental.update([day])
+    t_incremental = (time.perf_counter() - t0) / len(new_days)
+    sample = np.concatenate([history, new_days])
+    t0 = time.perf_counter()
+    shape, _, scale = stats.weibull_min.fit(sample[sample > 0], floc=0)
+    t_full = time.perf_counter() - t0
+    print(f"Incrémental ({incremental.n_zero} jours de calme) : shape={incremental.shape:.6f}, scale={incremental.scale:.6f} "
+          f"({1e6 * t_incremental:.0f} µs/jour) | Complet : shape={shape:.6f}, scale={scale:.6f} ({1e3 * t_full:.0f} ms)")
@@ -0,0 +1,114 @@
+import json
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+# Origine commune pour que les séries synthétiques soient identiques quelle que soit la fenêtre demandée
+ORIGIN = date(1940, 1, 1)
+
+
+def _site_seed(latitude, longitude):
+    return [int(round((latitude + 90) * 100)), int(round((longitude + 180) * 100))]
+
+
+def synthetic_daily(latitude, longitude, start_date, end_date):
+    """
+    Génère une série journalière déterministe de vitesses de vent maximales (km/h)
+    """
+    start = date.fromisoformat(start_date)
+    end = date.fromisoformat(end_date)
+    offset = (start - ORIGIN).days
+    n_days = (end - start).days + 1
+
+    rng = np.random.default_rng(_site_seed(latitude, longitude))
+    values = 25.0 * rng.weibull(2.2, size=offset + n_days)[offset:]
+
+    times = [(start + timedelta(days=i)).isoformat() for i in range(n_days)]
+    return times, np.round(values, 1).tolist()
+
+
+def synthetic_hourly(latitude, longitude, start_date, end_date):
+    """
+    Génère une série horaire déterministe de rafales de vent (km/h)
+    """
+    start = datetime.fromisoformat(start_date)
+    end = datetime.fromisoformat(end_date) + timedelta(days=1)
+    offset = int((start - datetime(ORIGIN.year, ORIGIN.month, ORIGIN.day)).total_seconds() // 3600)
+    n_hours = int((end - start).total_seconds() // 3600)
+
+    rng = np.random.default_rng(_site_seed(latitude, longitude) + [1])
+    values = 30.0 * rng.weibull(2.0, size=offset + n_hours)[offset:]
+
+    times = [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(n_hours)]
+    return times, np.round(values, 1).tolist()
+
+
+class _ArchiveHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/v1/archive":
+            self.send_error(404)
+            return
+
+        self.server.request_count += 1
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        latitudes = [float(v) for v in params["latitude"].split(",")]
+        longitudes = [float(v) for v in params["longitude"].split(",")]
+
+        # Comme l'API réelle : une coordonnée hors limites fait refuser toute la requête (400)
+        invalid = [(lat, lon) for lat, lon in zip(latitudes, longitudes) if abs(lat) > 90 or abs(lon) > 180]
+        if invalid:
+            reason = f"Coordonnées hors limites : {invalid[0]}"
+            self._send_json(400, {"error": True, "reason": reason})
+            return
+
+        payloads = []
+        for latitude, longitude in zip(latitudes, longitudes):
+            payload = {"latitude": latitude, "longitude": longitude}
+            if "daily" in params:
+                times, values = synthetic_daily(latitude, longitude, params["start_date"], params["end_date"])
+                payload["daily"] = {"time": times, params["daily"]: values}
+            if "hourly" in params:
+                times, values = synthetic_hourly(latitude, longitude, params["start_date"], params["end_date"])
+                payload["hourly"] = {"time": times, params["hourly"]: values}
+            payloads.append(payload)
+
+        self._send_json(200, payloads if len(payloads) > 1 else payloads[0])
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0):
+    """
+    Démarre un faux serveur Open-Meteo (endpoint /v1/archive) dans un thread.
+    Retourne le serveur et l'URL à utiliser comme OPEN_METEO_ARCHIVE_URL.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), _ArchiveHandler)
+    server.request_count = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/archive"
+    return server, url
+
+
+# Test
+if __name__ == "__main__":
+    server, url = start_stub_server(port=8765)
+    print(f"Serveur Open-Meteo de test démarré : {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,244 @@
+import numpy as np
+
+from src import metrics
+from src.lazy_imports import lazy_import
+
+# Modules lourds chargés à la première utilisation
+pd = lazy_import("pandas")
+stats = lazy_import("scipy.stats")
+special = lazy_import("scipy.special")
+
+# Types de tranches :
+#   "step"   : paie share × exposition si la vitesse du jour dépasse trigger
+#   "linear" : paie de 0 à share × exposition quand la vitesse va de trigger à exit
+#   "days"   : paie share × exposition si au moins `days` jours de la saison dépassent trigger
+LAYER_KINDS = ("step", "linear", "days")
+
+# Colonnes d'un tableau de tranches (une ligne par tranche, plusieurs tranches par contrat)
+LAYER_COLUMNS = ["design_id", "kind", "trigger", "exit", "days", "share"]
+
+# Nombre de jours d'une saison pour les déclenchements sur nombre de jours de dépassement
+SEASON_DAYS = 92
+
+
+def step_layers(triggers, payouts, design_id=0):
+    """
+    Barème en paliers : payouts[i] (part cumulée de l'exposition) dès que la vitesse dépasse triggers[i].
+
+    Exemple : step_layers([60, 80, 100], [0.25, 0.5, 1.0]) paie 25 % à 60 km/h, 50 % à 80 et 100 % à 100.
+    """
+    triggers = np.asarray(triggers, dtype=float)
+    payouts = np.asarray(payouts, dtype=float)
+    if np.any(np.diff(triggers) <= 0):
+        raise ValueError("Les seuils des paliers doivent être croissants")
+    return pd.DataFrame({
+        "design_id": design_id,
+        "kind": "step",
+        "trigger": triggers,
+        "exit": np.nan,
+        "days": np.nan,
+        # Chaque palier paie l'écart avec le palier précédent
+        "share": np.diff(payouts, prepend=0.0)
+    })
+
+
+def linear_layer(trigger, exit, share=1.0, design_id=0):
+    """
+    Tranche linéaire : paiement proportionnel entre trigger (0 %) et exit (share de l'exposition)
+    """
+    return pd.DataFrame([{"design_id": design_id, "kind": "linear", "trigger": float(trigger), "exit": float(exit),
+                          "days": np.nan, "share": float(share)}])
+
+
+def day_count_layers(trigger, days, payouts, design_id=0):
+    """
+    Barème sur le nombre de jours de la saison où la vitesse dépasse trigger :
+    payouts[i] (part cumulée de l'exposition) dès days[i] jours de dépassement
+    """
+    days = np.asarray(days, dtype=float)
+    if np.any(np.diff(days) <= 0):
+        raise ValueError("Les nombres de jours des paliers doivent être croissants")
+    return pd.DataFrame({
+        "design_id": design_id,
+        "kind": "days",
+        "trigger": float(trigger),
+        "exit": np.nan,
+        "days": days,
+        "share": np.diff(np.asarray(payouts, dtype=float), prepend=0.0)
+    })
+
+
+def _validate_layers(layers):
+    missing = [col for col in LAYER_COLUMNS if col not in layers.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans les tranches : {missing}")
+    unknown = sorted(set(layers["kind"]) - set(LAYER_KINDS))
+    if unknown:
+        raise ValueError(f"Types de tranches inconnus : {unknown} (attendus : {LAYER_KINDS})")
+    linear = (layers["kind"] == "linear").to_numpy()
+    if np.any(~(layers["exit"].to_numpy(dtype=float)[linear] > layers["trigger"].to_numpy(dtype=float)[linear])):
+        raise ValueError("Une tranche linéaire doit avoir exit > trigger")
+    days = (layers["kind"] == "days").to_numpy()
+    if np.any(~(layers["days"].to_numpy(dtype=float)[days] >= 1)):
+        raise ValueError("Une tranche sur nombre de jours doit avoir days >= 1")
+
+
+def expected_layer_payouts(shape, scale, layers, season_days=SEASON_DAYS):
+    """
+    Paiement espéré (en part de l'exposition) de chaque tranche pour chaque site : tableau (n_sites, n_tranches).
+
+    Formules fermées pour la loi de Weibull de survie S(x) = exp(-(x/λ)^k) :
+      - palier       : share × S(trigger)
+      - linéaire     : share / (exit - trigger) × ∫ S(x) dx entre trigger et exit,
+                       avec ∫ S = λ Γ(1 + 1/k) [P(1/k, (exit/λ)^k) - P(1/k, (trigger/λ)^k)] (gamma incomplète)
+      - nombre de jours : share × P(N >= days), N ~ Binomiale(season_days, S(trigger))
+    """
+    _validate_layers(layers)
+    shape = np.atleast_1d(np.asarray(shape, dtype=float))[:, None]
+    scale = np.atleast_1d(np.asarray(scale, dtype=float))[:, None]
+    share = layers["share"].to_numpy(dtype=float)
+
+    # Un balayage de contrats répète souvent les mêmes tranches : chacune n'est évaluée qu'une fois
+    geometry = layers[["kind", "trigger", "exit", "days"]].fillna({"exit": -1.0, "days": -1.0})
+    unique_index = ~geometry.duplicated().to_numpy()
+    unique = geometry[unique_index]
+    position = pd.Series(np.arange(len(unique)), index=pd.MultiIndex.from_frame(unique))
+    layer_position = position.reindex(pd.MultiIndex.from_frame(geometry)).to_numpy()
+
+    kind = unique["kind"].to_numpy()
+    trigger = unique["trigger"].to_numpy(dtype=float)[None, :]
+    payouts = np.zeros((max(len(shape), len(scale)), len(unique)))
+
+    step = kind == "step"
+    if step.any():
+        payouts[:, step] = stats.weibull_min.sf(trigger[:, step], shape, scale=scale)
+
+    linear = kind == "linear"
+    if linear.any():
+        lower, upper = trigger[:, linear], unique["exit"].to_numpy(dtype=float)[None, linear]
+        a = 1 / shape
+        integral = scale * special.gamma(1 + a) * (
+            special.gammainc(a, (upper / scale) ** shape) - special.gammainc(a, (lower / scale) ** shape)
+        )
+        payouts[:, linear] = integral / (upper - lower)
+
+    days = kind == "days"
+    if days.any():
+        daily_probability = stats.weibull_min.sf(trigger[:, days], shape, scale=scale)
+        required = unique["days"].to_numpy(dtype=float)[None, days]
+        payouts[:, days] = stats.binom.sf(required - 1, season_days, daily_probability)
+
+    return payouts[:, layer_position] * share
+
+
+@metrics.timed("pricer.payouts")
+def price_payouts(layers, sites=None, shape=None, scale=None, exposure=None, confidence_level=0.95,
+                  loading_factor=None, season_days=SEASON_DAYS, by_layer=False):
+    """
+    Calcule les primes de plusieurs contrats à tranches pour plusieurs sites en une seule passe vectorisée.
+
+    `layers` décrit les contrats (colonnes LAYER_COLUMNS, une ligne par tranche, regroupées par design_id) ;
+    `sites` est un DataFrame avec les colonnes shape, scale, exposure (et optionnellement confidence_level
+    ou loading_factor), ou les paramètres sont passés sous forme de tableaux comme pour price_portfolio.
+    Retourne une ligne par site et par contrat (ou par tranche si by_layer), avec la même marge de
+    sécurité que calculate_premium : un palier unique de part 1 redonne exactement calculate_premium.
+    """
+    site_index = None
+    if sites is not None:
+        missing = [col for col in ["shape", "scale", "exposure"] if col not in sites.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans le portefeuille : {missing}")
+        shape, scale, exposure = (sites[col].to_numpy(dtype=float) for col in ["shape", "scale", "exposure"])
+        if "confidence_level" in sites.columns:
+            confidence_level = sites["confidence_level"].to_numpy(dtype=float)
+        elif "loading_factor" in sites.columns:
+            loading_factor = sites["loading_factor"].to_numpy(dtype=float)
+        site_index = sites.index
+
+    # Le facteur de chargement de l'application correspond à confidence_level = 1 / facteur
+    if loading_factor is not None:
+        confidence_level = 1 / np.asarray(loading_factor, dtype=float)
+
+    shape, scale, exposure, confidence_level = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (shape, scale, exposure, confidence_level))
+    )
+    if site_index is None:
+        site_index = pd.RangeIndex(len(shape))
+
+    # Tranches regroupées par contrat (ordre conservé à l'intérieur de chaque contrat)
+    layers = layers.sort_values("design_id", kind="stable").reset_index(drop=True)
+    payouts = expected_layer_payouts(shape, scale, layers, season_days=season_days)
+
+    if by_layer:
+        labels = layers[LAYER_COLUMNS]
+    else:
+        # Somme des tranches de chaque contrat, en une réduction sur les blocs contigus de tranches
+        design_ids, first_layer = np.unique(layers["design_id"].to_numpy(), return_index=True)
+        payouts = np.add.reduceat(payouts, first_layer, axis=1)
+        labels = pd.DataFrame({"design_id": design_ids})
+
+    n_sites, n_columns = payouts.shape
+    premium = payouts * exposure[:, None]
+    margin_of_safety = premium * (1 - confidence_level[:, None])
+    results_df = pd.DataFrame({
+        "site": np.repeat(np.asarray(site_index), n_columns),
+        **{col: np.tile(labels[col].to_numpy(), n_sites) for col in labels.columns},
+        "Taux de paiement espéré": payouts.ravel(),
+        "Exposition": np.repeat(exposure, n_columns),
+        "Prime pure": premium.ravel(),
+        "Marge de sécurité": margin_of_safety.ravel(),
+        "Prime totale": (premium + margin_of_safety).ravel()
+    })
+    return results_df
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    from src.pricer import calculate_premium
+
+    # Contrat de la demande : 25 % à 60 km/h, 50 % à 80, 100 % à 100
+    layers = step_layers([60, 80, 100], [0.25, 0.5, 1.0])
+    print(price_payouts(layers, shape=2.2, scale=25.0, exposure=1e6).to_string(index=False))
+
+    # Un palier unique de part 1 redonne calculate_premium
+    single = price_payouts(step_layers([45.0], [1.0]), shape=2.2, scale=25.0, exposure=1e6, loading_factor=1.2)
+    reference = calculate_premium(2.2, 25.0, 45.0, 1e6, confidence_level=1 / 1.2)
+    assert np.isclose(single["Prime totale"].iloc[0], reference["Prime totale"].iloc[0], rtol=1e-12)
+
+    # La tranche linéaire fermée est comparée à une quadrature numérique
+    linear = expected_layer_payouts([2.2], [25.0], linear_layer(40, 70))[0, 0]
+    x = np.linspace(0, 200, 400001)
+    y = np.clip((x - 40) / 30, 0, 1) * stats.weibull_min.pdf(x, 2.2, scale=25.0)
+    quadrature = np.sum((y[1:] + y[:-1]) / 2 * np.diff(x))
+    print(f"Tranche linéaire 40-70 km/h : {linear:.6f} (quadrature : {quadrature:.6f})")
+
+    # Balayage : 1000 sites × 2000 contrats (paliers, linéaires et nombre de jours)
+    rng = np.random.default_rng(0)
+    n_sites, n_designs = 1000, 2000
+    designs = []
+    for design_id in range(n_designs):
+        # Seuils sur une grille de 1 km/h, comme dans un outil de structuration
+        low = float(rng.integers(35, 70))
+        kind = design_id % 3
+        if kind == 0:
+            designs.append(step_layers([low, low + 15, low + 30], [0.25, 0.5, 1.0], design_id=design_id))
+        elif kind == 1:
+            designs.append(linear_layer(low, low + rng.integers(10, 40), design_id=design_id))
+        else:
+            designs.append(day_count_layers(low, [1, 3, 5], [0.3, 0.6, 1.0], design_id=design_id))
+    designs = pd.concat(designs, ignore_index=True)
+    sites = pd.DataFrame({
+        "shape": rng.uniform(1.5, 3.0, n_sites),
+        "scale": rng.uniform(15, 35, n_sites),
+        "exposure": rng.uniform(1e5, 1e6, n_sites)
+    })
+
+    # Premier appel hors mesure : import de scipy
+    price_payouts(designs.head(3), sites.head(1))
+    t0 = time.perf_counter()
+    results = price_payouts(designs, sites)
+    elapsed = time.perf_counter() - t0
+    print(f"{n_sites} sites × {n_designs} contrats ({len(designs)} tranches) : {elapsed * 1000:.0f} ms "
+          f"({len(results)} primes)")
@@ -1,12 +1,19 @@
-from scipy.stats import weibull_min
-import pandas as pd
+import numpy as np
 
+from src import distributions, metrics
+from src.lazy_imports import lazy_import
+
+# Modules lourds chargés à la première utilisation
+pd = lazy_import("pandas")
+stats = lazy_import("scipy.stats")
+
+@metrics.timed("pricer.premium")
 def calculate_premium(shape,scale, threshold, exposure, confidence_level=0.95):
     """
     Calcule la prime d'assurance basée sur la distribution de Weibull ajustée
     """
     # Calculer la probabilité de dépassement du seuil
-    exceedance_probability = 1 - weibull_min.cdf(threshold, shape, loc=0, scale=scale)
+    exceedance_probability = 1 - stats.weibull_min.cdf(threshold, shape, loc=0, scale=scale)
     
     # Calculer la prime d'assurance
     premium = exceedance_probability * exposure
@@ -27,3 +34,117 @@ def calculate_premium(shape,scale, threshold, exposure, confidence_level=0.95):
     results_df = pd.DataFrame([results_dict])
     return  results_df
 
+
+def calculate_premium_from_model(model, threshold, exposure, confidence_level=0.95):
+    """
+    Calcule la prime d'assurance à partir d'un WeibullModel déjà calibré
+    """
+    return calculate_premium(model.shape, model.scale, threshold, exposure, confidence_level=confidence_level)
+
+
+# Colonnes attendues pour la tarification d'un portefeuille
+PORTFOLIO_COLUMNS = ["shape", "scale", "threshold", "exposure"]
+
+
+@metrics.timed("pricer.portfolio")
+def price_portfolio(sites=None, shape=None, scale=None, threshold=None, exposure=None, confidence_level=0.95, loading_factor=None):
+    """
+    Calcule les primes d'un portefeuille de sites en une seule passe vectorisée.
+
+    `sites` est un DataFrame avec les colonnes shape, scale, threshold, exposure
+    (et optionnellement confidence_level ou loading_factor) ; à défaut, les paramètres
+    peuvent être passés directement sous forme de tableaux. Donne les mêmes résultats
+    que calculate_premium appliqué ligne par ligne.
+    """
+    if sites is not None:
+        missing = [col for col in PORTFOLIO_COLUMNS if col not in sites.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans le portefeuille : {missing}")
+        shape, scale, threshold, exposure = (sites[col].to_numpy(dtype=float) for col in PORTFOLIO_COLUMNS)
+        if "confidence_level" in sites.columns:
+            confidence_level = sites["confidence_level"].to_numpy(dtype=float)
+        elif "loading_factor" in sites.columns:
+            loading_factor = sites["loading_factor"].to_numpy(dtype=float)
+
+    # Le facteur de chargement de l'application correspond à confidence_level = 1 / facteur
+    if loading_factor is not None:
+        confidence_level = 1 / np.asarray(loading_factor, dtype=float)
+
+    shape, scale, threshold, exposure, confidence_level = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (shape, scale, threshold, exposure, confidence_level))
+    )
+
+    # Mêmes calculs que calculate_premium, sur tous les sites à la fois
+    exceedance_probability = 1 - stats.weibull_min.cdf(threshold, shape, loc=0, scale=scale)
+    results_df = _premium_table(exceedance_probability, exposure, confidence_level)
+    if sites is not None:
+        results_df.index = sites.index
+    return results_df
+
+
+def _premium_table(exceedance_probability, exposure, confidence_level):
+    premium = exceedance_probability * exposure
+    margin_of_safety = premium * (1 - confidence_level)
+    total_premium = premium + margin_of_safety
+
+    return pd.DataFrame({
+        "Probabilité de dépassement du seuil": exceedance_probability,
+        "Exposition": exposure,
+        "Prime pure": premium,
+        "Marge de sécurité": margin_of_safety,
+        "Prime totale": total_premium
+    })
+
+
+@metrics.timed("pricer.best_models")
+def price_best_models(models, threshold, exposure, confidence_level=0.95, loading_factor=None):
+    """
+    Calcule les primes d'un portefeuille avec la meilleure loi de chaque site.
+
+    `models` est le résultat de select_best_models (colonnes family et param_1 à param_3) ;
+    la marge de sécurité est la même que dans calculate_premium.
+    """
+    if loading_factor is not None:
+        confidence_level = 1 / np.asarray(loading_factor, dtype=float)
+
+    threshold, exposure, confidence_level = np.broadcast_arrays(
+        *(np.broadcast_to(np.asarray(x, dtype=float), (len(models),)) for x in (threshold, exposure, confidence_level))
+    )
+    exceedance_probability = distributions.exceedance_probability(
+        models["family"].to_numpy(), models[distributions.PARAM_COLUMNS].to_numpy(dtype=float), threshold
+    )
+    results_df = _premium_table(exceedance_probability, exposure, confidence_level)
+    results_df.index = models.index
+    return results_df
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n_sites = 10000
+    sites = pd.DataFrame({
+        "shape": rng.uniform(1.5, 3.0, n_sites),
+        "scale": rng.uniform(15, 35, n_sites),
+        "threshold": rng.choice([35.0, 50.0, 70.0], n_sites),
+        "exposure": rng.uniform(1e5, 1e6, n_sites),
+        "loading_factor": rng.uniform(1.0, 2.0, n_sites)
+    })
+
+    # Premier appel hors mesure : import de scipy.stats
+    price_portfolio(sites.head(1))
+
+    t0 = time.perf_counter()
+    batch_df = price_portfolio(sites)
+    t_batch = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    loop_df = pd.concat([
+        calculate_premium(row.shape, row.scale, row.threshold, row.exposure, confidence_level=1 / row.loading_factor)
+        for row in sites.head(1000).itertuples()
+    ], ignore_index=True)
+    t_loop = (time.perf_counter() - t0) * n_sites / 1000
+
+    assert np.allclose(batch_df.head(1000).to_numpy(), loop_df.to_numpy(), rtol=1e-12, atol=0)
+    print(f"Vectorisé : {t_batch * 1000:.1f} ms | Boucle (estimée) : {t_loop * 1000:.0f} ms pour {n_sites} sites")
@@ -0,0 +1,200 @@
+"""
+Rafraîchissement en arrière-plan des données et des calibrages d'une liste de sites suivis.
+
+Exemples :
+    python -m src.scheduler watchlist.csv --once                 # un passage puis arrêt
+    python -m src.scheduler watchlist.csv --interval 21600       # toutes les 6 heures
+
+La liste de suivi (CSV) contient les colonnes site_id, latitude, longitude et optionnellement
+start_date et end_date ("latest" pour suivre les dernières données disponibles).
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+
+from src import metrics
+from src.data_fetcher import get_wind_data
+from src.fit_store import FitStore
+from src.lazy_imports import lazy_import
+from src.model_wind import IncrementalWeibullFit, data_hash, get_weibull_model
+from src.wind_cache import round_coords
+from src.wind_series import WindSeries
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+# Période par défaut (mêmes valeurs que l'application)
+DEFAULT_START_DATE = "2022-01-01"
+DEFAULT_END_DATE = "2025-12-31"
+
+# Rafraîchissements simultanés et délai aléatoire avant chaque site (étale les requêtes Open-Meteo)
+MAX_CONCURRENT_REFRESHES = 4
+JITTER_SECONDS = 1.0
+
+# Période entre deux passages ; un site non rafraîchi depuis deux périodes est signalé périmé
+REFRESH_INTERVAL_SECONDS = 6 * 3600
+
+
+def read_watchlist(path):
+    """
+    Lit la liste de suivi (CSV) et complète les périodes par défaut
+    """
+    watchlist = pd.read_csv(path, dtype={"site_id": str})
+    missing = [col for col in ["site_id", "latitude", "longitude"] if col not in watchlist.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans {path} : {missing}")
+    if "start_date" not in watchlist.columns:
+        watchlist["start_date"] = DEFAULT_START_DATE
+    if "end_date" not in watchlist.columns:
+        watchlist["end_date"] = DEFAULT_END_DATE
+    watchlist["start_date"] = watchlist["start_date"].fillna(DEFAULT_START_DATE)
+    watchlist["end_date"] = watchlist["end_date"].fillna(DEFAULT_END_DATE)
+    return watchlist.to_dict("records")
+
+
+def _resolve_end_date(end_date):
+    # "latest" : jusqu'à hier (les derniers jours, encore provisoires, sont retéléchargés à chaque passage)
+    if end_date == "latest":
+        return (date.today() - timedelta(days=1)).isoformat()
+    return str(end_date)
+
+
+class WatchlistScheduler:
+    """
+    Rafraîchit périodiquement l'historique et le calibrage de chaque site de la liste de suivi.
+
+    Les données passent par get_wind_data (seules les dates manquantes sont téléchargées), avec
+    un nombre borné de sites traités en même temps et un délai aléatoire avant chacun.
+    Un site dont les données n'ont pas changé (même empreinte) n'est pas recalibré ; un site dont
+    l'historique s'est allongé l'est de façon incrémentale (IncrementalWeibullFit), à partir des
+    statistiques enregistrées avec l'état du site lors du passage précédent.
+    Les calibrages sont enregistrés dans le FitStore lu par l'application et l'API de cotation.
+    """
+
+    def __init__(self, watchlist, fit_store=None, max_concurrency=MAX_CONCURRENT_REFRESHES,
+                 interval=REFRESH_INTERVAL_SECONDS, jitter=JITTER_SECONDS):
+        self.watchlist = list(watchlist)
+        self.fit_store = fit_store or FitStore()
+        self.max_concurrency = max_concurrency
+        self.interval = interval
+        self.jitter = jitter
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _incremental_fit(previous, start_date, series):
+        # Reprise de l'état du passage précédent si la période commence au même jour et que des jours
+        # se sont ajoutés ; sinon (nouveau site, période ou données révisées) calibrage complet.
+        # Les derniers jours provisoires déjà comptés ne sont pas relus : le contrôle complet
+        # périodique d'extend corrige cet écart.
+        state = previous.get("incremental")
+        if state and previous.get("start_date") == start_date and len(series):
+            try:
+                fit = IncrementalWeibullFit.from_dict(state)
+            except (KeyError, TypeError, ValueError):
+                fit = None
+            if fit is not None and fit.last_date is not None and fit.last_date < series.dates[-1]:
+                metrics.increment("scheduler.incremental")
+                fit.extend(series)
+                return fit
+        return IncrementalWeibullFit(series)
+
+    def refresh_site(self, site):
+        """
+        Rafraîchit un site ; retourne "unchanged", "refitted" ou "error"
+        """
+        site_id = str(site["site_id"])
+        latitude, longitude = round_coords(site["latitude"], site["longitude"])
+        start_date, end_date = str(site["start_date"]), _resolve_end_date(site["end_date"])
+        previous = self.fit_store.site(site_id) or {}
+        record = dict(previous, latitude=latitude, longitude=longitude, start_date=start_date, end_date=end_date)
+
+        if self.jitter:
+            time.sleep(random.uniform(0, self.jitter))
+        try:
+            with metrics.span("scheduler.refresh", site_id=site_id):
+                series = WindSeries.from_frame(get_wind_data(latitude, longitude, start_date, end_date))
+                key = data_hash(series)
+                now = time.time()
+                record.update(refreshed_at=now, error=None, n_days=len(series),
+                              last_date=str(series.dates[-1]) if len(series) else None)
+
+                if key == previous.get("data_hash") and self.fit_store.params(key) is not None:
+                    record["status"] = "unchanged"
+                    self.fit_store.update_site(site_id, record)
+                else:
+                    fit = self._incremental_fit(previous, start_date, series)
+                    params = (fit.shape, fit.scale) if np.isfinite(fit.shape) and np.isfinite(fit.scale) else None
+                    # Le modèle est aussi gardé dans le cache LRU si le planificateur tourne dans l'application
+                    model = get_weibull_model(series, lookup=lambda _: params)
+                    record.update(status="refitted", data_hash=key, fitted_at=now, incremental=fit.to_dict())
+                    self.fit_store.update_site(site_id, record, fit={
+                        "shape": float(model.shape), "scale": float(model.scale), "n_days": len(series), "fitted_at": now
+                    })
+        except Exception as e:
+            # L'ancien calibrage reste utilisable ; l'erreur est visible dans le suivi de fraîcheur
+            record.update(status="error", error=str(e))
+            self.fit_store.update_site(site_id, record)
+
+        metrics.increment(f"scheduler.{record['status']}")
+        return record["status"]
+
+    def run_once(self):
+        """
+        Un passage sur toute la liste de suivi ; retourne le nombre de sites par statut
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="watchlist") as executor:
+            statuses = list(executor.map(self.refresh_site, self.watchlist))
+        return {status: statuses.count(status) for status in sorted(set(statuses))}
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            # Période légèrement variable pour ne pas synchroniser plusieurs instances
+            self._stop.wait(self.interval * random.uniform(0.9, 1.1))
+
+    def start(self):
+        """
+        Lance les passages périodiques dans un thread en arrière-plan
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="watchlist-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def staleness(self):
+        return self.fit_store.staleness(max_age_hours=2 * self.interval / 3600)
+
+
+# Lancement en ligne de commande
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rafraîchissement des sites de la liste de suivi")
+    parser.add_argument("watchlist", help="Liste de suivi (CSV : site_id, latitude, longitude[, start_date, end_date])")
+    parser.add_argument("--once", action="store_true", help="Un seul passage")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL_SECONDS, help="Période entre deux passages (s)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_REFRESHES, help="Sites rafraîchis en même temps")
+    parser.add_argument("--jitter", type=float, default=JITTER_SECONDS, help="Délai aléatoire maximal avant chaque site (s)")
+    args = parser.parse_args()
+
+    scheduler = WatchlistScheduler(read_watchlist(args.watchlist), max_concurrency=args.concurrency,
+                                   interval=args.interval, jitter=args.jitter)
+    while True:
+        t0 = time.perf_counter()
+        counts = scheduler.run_once()
+        print(f"{len(scheduler.watchlist)} sites en {time.perf_counter() - t0:.1f} s : {counts}", flush=True)
+        if args.once:
+            break
+        time.sleep(args.interval * random.uniform(0.9, 1.1))
+    print(scheduler.staleness().to_string(index=False))
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.lazy_imports import lazy_import
+
+# Modules lourds chargés à la première utilisation (inutiles dans les workers de simulation)
+pd = lazy_import("pandas")
+special = lazy_import("scipy.special")
+stats = lazy_import("scipy.stats")
+
+DAYS_PER_YEAR = 365
+
+# Nombre maximal de tirages (jours x sites) générés par paquet : borne la mémoire de chaque worker
+MAX_DRAWS_PER_CHUNK = 4_000_000
+
+# Portée de la corrélation spatiale entre sites (décroissance exponentielle avec la distance)
+DEFAULT_CORRELATION_LENGTH_KM = 50.0
+
+EARTH_RADIUS_KM = 6371.0
+
+# Paramètres partagés par les workers (envoyés une seule fois à chaque processus)
+_worker_params = None
+
+
+def distance_matrix_km(latitudes, longitudes):
+    """
+    Distances orthodromiques (formule de haversine) entre tous les sites
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def correlation_matrix(latitudes, longitudes, correlation_length_km=DEFAULT_CORRELATION_LENGTH_KM):
+    """
+    Matrice de corrélation entre sites : exp(-distance / portée)
+    """
+    return np.exp(-distance_matrix_km(latitudes, longitudes) / correlation_length_km)
+
+
+def _init_worker(params):
+    global _worker_params
+    _worker_params = params
+
+
+def _simulate_chunk(task):
+    """
+    Simule un paquet d'années et renvoie les pertes annuelles du portefeuille et le total payé par site
+    """
+    seed, n_years = task
+    z_threshold, exposure, cholesky, max_events = _worker_params
+    n_sites = len(exposure)
+    rng = np.random.default_rng(seed)
+
+    # Vents journaliers corrélés via une copule gaussienne : le vent dépasse le seuil
+    # exactement quand la variable gaussienne associée dépasse le quantile du seuil
+    z = rng.standard_normal((n_years * DAYS_PER_YEAR, n_sites)) @ cholesky.T
+    events = (z > z_threshold).reshape(n_years, DAYS_PER_YEAR, n_sites).sum(axis=1)
+    if max_events is not None:
+        events = np.minimum(events, max_events)
+
+    payouts = events * exposure
+    return payouts.sum(axis=1), payouts.sum(axis=0)
+
+
+# Définition des paiements simulés, rappelée dans les résultats (différente de celle de la prime)
+PAYOUT_BASIS = "Pertes annuelles : exposition payée à chaque jour de dépassement"
+
+
+def summarize_losses(annual_losses, levels=(0.95, 0.99, 0.995)):
+    """
+    VaR et TVaR des pertes annuelles pour chaque niveau de confiance
+    """
+    sorted_losses = np.sort(annual_losses)
+    rows = []
+    for level in levels:
+        var = np.quantile(sorted_losses, level)
+        tail = sorted_losses[sorted_losses >= var]
+        rows.append({"Niveau": level, "VaR annuelle": var, "TVaR annuelle": tail.mean()})
+    return pd.DataFrame(rows)
+
+
+def simulate_portfolio_losses(shape, scale, threshold, exposure, latitudes=None, longitudes=None,
+                              n_years=10000, correlation_length_km=DEFAULT_CORRELATION_LENGTH_KM,
+                              max_events_per_year=None, seed=0, max_workers=None, levels=(0.95, 0.99, 0.995)):
+    """
+    Simulation Monte Carlo des paiements annuels agrégés d'un portefeuille de sites.
+
+    Chaque jour où le vent maximal d'un site dépasse son seuil déclenche un paiement égal
+    à son exposition (plafonné à max_events_per_year paiements par an si renseigné) : les pertes
+    sont annuelles. calculate_premium tarife un seul paiement, pour un jour donné ; le montant
+    comparable à sa prime pure est la perte moyenne par jour (site_expected_loss_per_day),
+    égale à P(vent > seuil) x exposition en l'absence de plafond.
+    Les vents des sites sont corrélés selon leur distance si les coordonnées sont fournies.
+    Les années sont simulées par paquets de taille fixe répartis sur un pool de processus ;
+    seules les pertes annuelles sont conservées. Les résultats ne dépendent que de `seed`.
+    """
+    shape, scale, threshold, exposure = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(x, dtype=float)) for x in (shape, scale, threshold, exposure))
+    )
+    n_sites = len(shape)
+
+    if latitudes is not None and longitudes is not None:
+        correlation = correlation_matrix(latitudes, longitudes, correlation_length_km)
+    else:
+        correlation = np.eye(n_sites)
+    cholesky = np.linalg.cholesky(correlation + 1e-10 * np.eye(n_sites))
+
+    # Quantile gaussien du seuil : P(Z > z_threshold) = P(vent > seuil)
+    z_threshold = special.ndtri(stats.weibull_min.cdf(threshold, shape, loc=0, scale=scale))
+    params = (z_threshold, exposure, cholesky, max_events_per_year)
+
+    # Découpage en paquets de taille fixe, chacun avec sa propre graine dérivée de `seed`
+    chunk_years = max(1, MAX_DRAWS_PER_CHUNK // (DAYS_PER_YEAR * n_sites))
+    chunk_sizes = [min(chunk_years, n_years - start) for start in range(0, n_years, chunk_years)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    tasks = list(zip(seeds, chunk_sizes))
+
+    annual_losses = np.empty(n_years)
+    site_totals = np.zeros(n_sites)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) == 1:
+        _init_worker(params)
+        results = map(_simulate_chunk, tasks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(params,))
+        results = executor.map(_simulate_chunk, tasks)
+
+    # Accumulation au fil de l'eau : seuls les tirages d'un paquet sont en mémoire à un instant donné
+    # (bornés par MAX_DRAWS_PER_CHUNK) ; le tableau des pertes annuelles, lui, croît avec n_years
+    try:
+        position = 0
+        for chunk_losses, chunk_site_totals in results:
+            annual_losses[position:position + len(chunk_losses)] = chunk_losses
+            site_totals += chunk_site_totals
+            position += len(chunk_losses)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        "payout_basis": PAYOUT_BASIS,
+        "annual_losses": annual_losses,
+        "expected_loss": annual_losses.mean(),
+        "site_expected_loss": site_totals / n_years,
+        # Même base que la prime pure de calculate_premium (un paiement pour un jour donné)
+        "site_expected_loss_per_day": site_totals / (n_years * DAYS_PER_YEAR),
+        "summary": summarize_losses(annual_losses, levels)
+    }
+
+
+# Test
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    n_sites = 50
+    latitudes = rng.uniform(43.5, 45.0, n_sites)
+    longitudes = rng.uniform(-1.0, 1.0, n_sites)
+
+    shapes, scales = rng.uniform(1.8, 2.6, n_sites), rng.uniform(18, 26, n_sites)
+
+    t0 = time.perf_counter()
+    results = simulate_portfolio_losses(
+        shape=shapes,
+        scale=scales,
+        threshold=60.0,
+        exposure=100000.0,
+        latitudes=latitudes,
+        longitudes=longitudes,
+        n_years=20000,
+        seed=42
+    )
+    print(f"Simulation de 20000 années en {time.perf_counter() - t0:.1f} s")
+    print(f"Perte annuelle moyenne : {results['expected_loss']:.0f} € ({results['payout_basis'].lower()})")
+    print(results["summary"])
+
+    # Perte moyenne par jour, à comparer aux primes pures de calculate_premium
+    from src.pricer import price_portfolio
+    pure_premiums = price_portfolio(shape=shapes, scale=scales, threshold=60.0, exposure=100000.0)["Prime pure"]
+    print(f"Perte moyenne par jour (tous sites) : {results['site_expected_loss_per_day'].sum():.1f} € | "
+          f"somme des primes pures : {pure_premiums.sum():.1f} €")
@@ -0,0 +1,142 @@
+import json
+import os
+
+import numpy as np
+
+from src.data_fetcher import fetch_wind_data_bulk
+from src.lazy_imports import lazy_import
+from src.model_wind import fit_weibull_batch
+from src.wind_cache import DEFAULT_CACHE_DIR
+
+# Modules lourds chargés à la première utilisation
+pd = lazy_import("pandas")
+spatial = lazy_import("scipy.spatial")
+
+# Fichier de la grille précalculée (surchargeable)
+DEFAULT_GRID_PATH = os.environ.get("WIND_GRID_PATH", os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "weibull_grid.npy"))
+
+# Un enregistrement compact par point de grille (lisible directement en mémoire projetée)
+GRID_DTYPE = np.dtype([
+    ("latitude", "f4"),
+    ("longitude", "f4"),
+    ("shape", "f4"),
+    ("scale", "f4"),
+    ("n_days", "i4")
+])
+
+# Au-delà de cette distance au point de grille le plus proche, pas de devis indicatif
+MAX_LOOKUP_DISTANCE_KM = 50.0
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _to_xyz(latitudes, longitudes):
+    """
+    Coordonnées cartésiennes sur la sphère unité (distances correctes pour le KD-tree)
+    """
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def build_weibull_grid(lat_min, lat_max, lon_min, lon_max, step, start_date, end_date, path=DEFAULT_GRID_PATH):
+    """
+    Calibre les paramètres de Weibull sur une grille régulière et les enregistre dans un fichier .npy
+    """
+    latitudes, longitudes = np.meshgrid(
+        np.arange(lat_min, lat_max + step / 2, step),
+        np.arange(lon_min, lon_max + step / 2, step),
+        indexing="ij"
+    )
+    sites = pd.DataFrame({"site_id": np.arange(latitudes.size), "latitude": latitudes.ravel(), "longitude": longitudes.ravel()})
+
+    # Téléchargement de tous les points de grille puis calibrage par lots
+    series = [None] * len(sites)
+    for result in fetch_wind_data_bulk(sites, start_date, end_date):
+        if result.error is None:
+            series[result.site_id] = result.data["wind_speed_max"].to_numpy(dtype=float)
+    ok = np.array([x is not None for x in series])
+    shapes, scales = np.full(len(sites), np.nan), np.full(len(sites), np.nan)
+    shapes[ok], scales[ok] = fit_weibull_batch([x for x in series if x is not None])
+
+    # Points dont le calibrage a échoué (NaN) : exclus, ils fausseraient l'interpolation
+    ok &= np.isfinite(shapes) & np.isfinite(scales)
+    cells = np.zeros(int(ok.sum()), dtype=GRID_DTYPE)
+    cells["latitude"] = sites["latitude"][ok]
+    cells["longitude"] = sites["longitude"][ok]
+    cells["shape"] = shapes[ok]
+    cells["scale"] = scales[ok]
+    cells["n_days"] = [int(np.sum(~np.isnan(series[i]))) for i in np.flatnonzero(ok)]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.save(path, cells)
+    with open(f"{path}.json", "w") as f:
+        json.dump({"start_date": start_date, "end_date": end_date, "step": step}, f)
+    return cells
+
+
+class WeibullGrid:
+    """
+    Grille précalculée des paramètres de Weibull avec recherche des plus proches voisins
+    """
+
+    def __init__(self, path=DEFAULT_GRID_PATH):
+        self.cells = np.load(path, mmap_mode="r")
+        # Grilles construites avant l'exclusion des calibrages en échec : les points NaN sont ignorés
+        self.valid = np.flatnonzero(np.isfinite(self.cells["shape"]) & np.isfinite(self.cells["scale"]))
+        self.tree = None
+        if len(self.valid):
+            self.tree = spatial.cKDTree(_to_xyz(self.cells["latitude"][self.valid], self.cells["longitude"][self.valid]))
+
+        metadata_path = f"{path}.json"
+        self.metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                self.metadata = json.load(f)
+
+    def lookup(self, latitude, longitude, k=4):
+        """
+        Paramètres shape et scale interpolés (inverse de la distance) aux coordonnées demandées,
+        et distance au point de grille le plus proche (km). None si la grille n'a aucun point calibré.
+        """
+        if self.tree is None:
+            return None
+        k = min(k, len(self.valid))
+        chord, index = self.tree.query(_to_xyz(np.atleast_1d(latitude), np.atleast_1d(longitude)), k=k)
+        chord = chord.reshape(len(chord), k)
+        index = self.valid[index.reshape(len(index), k)]
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+        weights = 1 / np.maximum(distance_km, 1e-6) ** 2
+        weights /= weights.sum(axis=1, keepdims=True)
+        shape = (weights * self.cells["shape"][index]).sum(axis=1)
+        scale = (weights * self.cells["scale"][index]).sum(axis=1)
+
+        if np.isscalar(latitude):
+            return shape[0], scale[0], distance_km[0, 0]
+        return shape, scale, distance_km[:, 0]
+
+
+# Construction de la grille
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Précalcul d'une grille de paramètres de Weibull")
+    parser.add_argument("--lat", type=float, nargs=2, default=[42.0, 51.5], help="Latitudes min et max")
+    parser.add_argument("--lon", type=float, nargs=2, default=[-5.0, 8.5], help="Longitudes min et max")
+    parser.add_argument("--step", type=float, default=0.25, help="Pas de la grille (degrés)")
+    parser.add_argument("--start", default="2022-01-01", help="Date de début")
+    parser.add_argument("--end", default="2025-12-31", help="Date de fin")
+    parser.add_argument("--output", default=DEFAULT_GRID_PATH, help="Fichier .npy de sortie")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    cells = build_weibull_grid(args.lat[0], args.lat[1], args.lon[0], args.lon[1], args.step, args.start, args.end, args.output)
+    print(f"{len(cells)} points de grille calibrés en {time.perf_counter() - t0:.1f} s -> {args.output}")
+
+    grid = WeibullGrid(args.output)
+    t0 = time.perf_counter()
+    shape, scale, distance = grid.lookup(44.2971, 0.1178)
+    assert np.isfinite(shape) and np.isfinite(scale)
+    print(f"Recherche en {1e6 * (time.perf_counter() - t0):.0f} µs : shape={shape:.2f}, scale={scale:.2f} ({distance:.1f} km)")
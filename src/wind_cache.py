@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+from src.lazy_imports import lazy_import
+
+# Modules lourds chargés à la première utilisation
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+
+# Répertoire du cache (surchargeable, ex: disque persistant sur Render)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WIND_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "wind_data")
+)
+
+# Précision des coordonnées dans la clé du cache (0.01° ~ 1 km, bien plus fin que la grille Open-Meteo)
+COORD_DECIMALS = 2
+
+# Les derniers jours de l'archive Open-Meteo ne sont pas encore consolidés : on ne les marque pas comme couverts
+ARCHIVE_DELAY_DAYS = 7
+
+_METADATA_KEY = b"covered_ranges"
+
+
+def round_coords(latitude, longitude):
+    return round(float(latitude), COORD_DECIMALS), round(float(longitude), COORD_DECIMALS)
+
+
+def _merge_ranges(ranges):
+    """
+    Fusionne des intervalles de dates [début, fin] qui se chevauchent ou se touchent
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class WindDataStore:
+    """
+    Cache Parquet des historiques de vent, un fichier par site (lat/lon arrondies).
+    Les plages de dates déjà téléchargées sont conservées dans les métadonnées du fichier.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+
+    def _path(self, latitude, longitude):
+        latitude, longitude = round_coords(latitude, longitude)
+        return os.path.join(self.cache_dir, f"{latitude:+.{COORD_DECIMALS}f}_{longitude:+.{COORD_DECIMALS}f}.parquet")
+
+    def covered_ranges(self, latitude, longitude):
+        """
+        Plages de dates [début, fin] déjà présentes dans le cache pour ce site
+        """
+        path = self._path(latitude, longitude)
+        if not os.path.exists(path):
+            return []
+        metadata = pq.read_schema(path).metadata or {}
+        ranges = json.loads(metadata.get(_METADATA_KEY, b"[]"))
+        return [[date.fromisoformat(start), date.fromisoformat(end)] for start, end in ranges]
+
+    def missing_ranges(self, latitude, longitude, start_date, end_date):
+        """
+        Plages de dates à télécharger pour compléter la période demandée
+        """
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+
+        gaps = []
+        cursor = start
+        for covered_start, covered_end in self.covered_ranges(latitude, longitude):
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor.isoformat(), (covered_start - timedelta(days=1)).isoformat()))
+            cursor = covered_end + timedelta(days=1)
+        if cursor <= end:
+            gaps.append((cursor.isoformat(), end.isoformat()))
+        return gaps
+
+    def read(self, latitude, longitude, start_date, end_date):
+        """
+        Lit les données du cache pour la période demandée (même format que get_wind_data)
+        """
+        path = self._path(latitude, longitude)
+        if not os.path.exists(path):
+            return pd.DataFrame({"date": pd.Series(dtype=object), "wind_speed_max": pd.Series(dtype=float)})
+
+        df = pq.read_table(path, filters=[("date", ">=", start_date), ("date", "<=", end_date)]).to_pandas()
+        return df.reset_index(drop=True)
+
+    def write(self, latitude, longitude, df, start_date, end_date):
+        """
+        Fusionne de nouvelles données dans le cache et enregistre la plage couverte
+        """
+        path = self._path(latitude, longitude)
+        start = date.fromisoformat(start_date)
+        end = min(date.fromisoformat(end_date), date.today() - timedelta(days=ARCHIVE_DELAY_DAYS))
+
+        with self._lock:
+            ranges = self.covered_ranges(latitude, longitude)
+            if start <= end:
+                ranges = _merge_ranges(ranges + [[start, end]])
+
+            if os.path.exists(path):
+                df = pd.concat([pq.read_table(path).to_pandas(), df], ignore_index=True)
+            df = df.drop_duplicates(subset="date", keep="last").sort_values("date").reset_index(drop=True)
+
+            table = pa.Table.from_pandas(df[["date", "wind_speed_max"]], preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[_METADATA_KEY] = json.dumps([[s.isoformat(), e.isoformat()] for s, e in ranges]).encode()
+            table = table.replace_schema_metadata(metadata)
+
+            # Écriture atomique pour ne jamais laisser un fichier à moitié écrit
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+
+
+# Test
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from src.open_meteo_stub import start_stub_server
+
+    server, url = start_stub_server()
+    os.environ["OPEN_METEO_ARCHIVE_URL"] = url
+    os.environ["WIND_CACHE_DIR"] = tempfile.mkdtemp()
+
+    from src import data_fetcher
+
+    for start_date, end_date in [("2022-01-01", "2023-12-31"), ("2022-01-01", "2025-12-31"), ("2022-01-01", "2025-12-31")]:
+        t0 = time.perf_counter()
+        df = data_fetcher.get_wind_data(44.2971, 0.1178, start_date, end_date)
+        print(f"{start_date} -> {end_date} : {len(df)} jours en {1000 * (time.perf_counter() - t0):.1f} ms "
+              f"({server.request_count} requêtes au total)")
+    server.shutdown()
@@ -0,0 +1,140 @@
+import pickle
+
+import numpy as np
+
+from src.lazy_imports import lazy_import
+
+# Chargé à la première utilisation
+pd = lazy_import("pandas")
+
+
+def _from_buffers(dates_buffer, wind_speeds_buffer):
+    # Reconstruction sans copie : les tableaux sont des vues sur les buffers reçus
+    dates = np.frombuffer(dates_buffer, dtype=np.int64).view("datetime64[D]")
+    return WindSeries(dates, np.frombuffer(wind_speeds_buffer, dtype=np.float64))
+
+
+def _read_only(values, dtype):
+    values = np.asarray(values, dtype=dtype)
+    # On ne fige jamais le tableau de l'appelant : copie sauf s'il est déjà en lecture seule et contigu
+    if values.flags.writeable or not values.flags.c_contiguous:
+        values = np.array(values, dtype=dtype, order="C")
+        values.flags.writeable = False
+    return values
+
+
+class WindSeries:
+    """
+    Historique de vent journalier compact et immuable : dates en datetime64[D] et vitesses
+    en float64, dans deux tableaux contigus en lecture seule.
+
+    S'utilise comme le DataFrame de get_wind_data pour les lectures (series["date"],
+    series["wind_speed_max"], len(series)) ; n'étant jamais modifié, il peut être partagé
+    entre sessions sans copie. La sérialisation (pickle protocole 5) se fait sans copie des tableaux.
+
+    Les vitesses restent en float64, comme dans le DataFrame : data_hash, le calibrage et les
+    primes sont identiques quel que soit le conteneur, et to_frame redonne exactement les données.
+    """
+
+    __slots__ = ("dates", "wind_speed_max")
+    columns = ("date", "wind_speed_max")
+
+    def __init__(self, dates, wind_speed_max):
+        dates = _read_only(dates, "datetime64[D]")
+        wind_speed_max = _read_only(wind_speed_max, np.float64)
+        if dates.shape != wind_speed_max.shape or dates.ndim != 1:
+            raise ValueError(f"Dates ({dates.shape}) et vitesses ({wind_speed_max.shape}) de tailles différentes")
+        object.__setattr__(self, "dates", dates)
+        object.__setattr__(self, "wind_speed_max", wind_speed_max)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("WindSeries est immuable")
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Conversion du DataFrame (date, wind_speed_max) de get_wind_data
+        """
+        return cls(np.asarray(df["date"], dtype="datetime64[D]"), df["wind_speed_max"])
+
+    def to_frame(self):
+        """
+        DataFrame au format de get_wind_data (dates en chaînes ISO, vitesses en float64)
+        """
+        return pd.DataFrame({
+            "date": np.datetime_as_string(self.dates, unit="D").astype(object),
+            "wind_speed_max": self.wind_speed_max.astype(float)
+        })
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, key):
+        # Le type est testé d'abord : comparer un masque à une chaîne donnerait un tableau
+        if isinstance(key, str):
+            if key == "date":
+                return self.dates
+            if key == "wind_speed_max":
+                return self.wind_speed_max
+            raise KeyError(key)
+        if isinstance(key, (int, np.integer)):
+            raise TypeError("Indexer une WindSeries par une tranche, un masque ou un tableau d'indices")
+        # Tranche, masque booléen ou tableau d'indices : nouvelle série
+        return WindSeries(self.dates[key], self.wind_speed_max[key])
+
+    def __repr__(self):
+        if not len(self):
+            return "WindSeries(0 jours)"
+        return f"WindSeries({len(self)} jours, {self.dates[0]} -> {self.dates[-1]}, {self.nbytes} octets)"
+
+    @property
+    def nbytes(self):
+        return self.dates.nbytes + self.wind_speed_max.nbytes
+
+    def to_buffers(self):
+        """
+        Buffers bruts (dates en jours depuis 1970 sur int64, vitesses en float64), sans copie
+        """
+        return memoryview(self.dates.view(np.int64)), memoryview(self.wind_speed_max)
+
+    @classmethod
+    def from_buffers(cls, dates_buffer, wind_speeds_buffer):
+        return _from_buffers(dates_buffer, wind_speeds_buffer)
+
+    def __reduce_ex__(self, protocol):
+        if protocol >= 5:
+            # Buffers hors bande possibles : pickle.dumps(series, protocol=5, buffer_callback=...)
+            dates, wind_speeds = self.to_buffers()
+            return _from_buffers, (pickle.PickleBuffer(dates), pickle.PickleBuffer(wind_speeds))
+        return WindSeries, (self.dates, self.wind_speed_max)
+
+
+# Test
+if __name__ == "__main__":
+    import sys
+
+    n_days = 30 * 365
+    df = pd.DataFrame({
+        "date": pd.date_range("1995-01-01", periods=n_days).strftime("%Y-%m-%d"),
+        "wind_speed_max": np.round(22.0 * np.random.default_rng(0).weibull(2.3, size=n_days), 1)
+    })
+    series = WindSeries.from_frame(df)
+
+    # Aller-retour exact et même empreinte que le DataFrame (clé du cache des modèles)
+    from src.model_wind import data_hash
+    assert series.to_frame().equals(df)
+    assert data_hash(series) == data_hash(df)
+    mask = series.wind_speed_max > 30
+    assert len(series[mask]) == mask.sum() and len(series[np.array([1, 2, 3])]) == 3
+
+    frame_bytes = df.memory_usage(deep=True).sum()
+    print(f"DataFrame : {frame_bytes / 1e3:.0f} ko | WindSeries : {series.nbytes / 1e3:.0f} ko "
+          f"({frame_bytes / series.nbytes:.1f}x moins)")
+
+    # Sérialisation hors bande : les buffers ne sont pas copiés dans le flux pickle
+    buffers = []
+    payload = pickle.dumps(series, protocol=5, buffer_callback=buffers.append)
+    restored = pickle.loads(payload, buffers=buffers)
+    print(f"Pickle protocole 5 : {len(payload)} octets + {len(buffers)} buffers partagés "
+          f"(même mémoire : {np.shares_memory(restored.wind_speed_max, series.wind_speed_max)})")
+    print(restored, sys.getsizeof(pickle.dumps(series)), "octets en pickle classique")
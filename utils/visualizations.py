@@ -1,12 +1,86 @@
-import plotly.graph_objects as go
-import pandas as pd
+import numpy as np
+
+from src import metrics
+from src.lazy_imports import lazy_import
+
+# Modules lourds chargés à la première utilisation (démarrage plus rapide de l'application)
+go = lazy_import("plotly.graph_objects")
+pd = lazy_import("pandas")
+
+# Nombre maximal de points envoyés au navigateur par courbe temporelle
+MAX_PLOT_POINTS = 2000
+
+# Au-delà de ce nombre de points (après réduction), les courbes sont rendues en WebGL : choisi sous
+# MAX_PLOT_POINTS pour que les historiques de plusieurs années, même réduits, en bénéficient
+WEBGL_THRESHOLD = 1000
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices des points conservés par l'algorithme Largest-Triangle-Three-Buckets,
+    qui préserve la forme de la courbe (pics compris) avec n_out points
+    """
+    n = len(x)
+    if n_out is None or n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    y = np.where(np.isnan(y), np.nanmean(y) if np.any(~np.isnan(y)) else 0.0, y)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Point du seau courant formant le plus grand triangle avec le point précédent et la moyenne du seau suivant
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def _columns(df):
+    """
+    Dates (datetime64[D]) et vitesses (float64) d'un DataFrame de get_wind_data ou d'une WindSeries, sans modifier l'entrée
+    """
+    return np.asarray(df['date'], dtype='datetime64[D]'), np.asarray(df['wind_speed_max'], dtype=float)
+
+
+def rolling_mean(values, window):
+    """
+    Moyenne mobile centrée (même alignement que pandas rolling(window, center=True).mean())
+    """
+    values = np.asarray(values, dtype=float)
+    result = np.full(len(values), np.nan)
+    if len(values) < window:
+        return result
+    valid = ~np.isnan(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    offset = window // 2
+    result[offset:offset + len(window_sums)] = np.where(window_counts == window, window_sums / window, np.nan)
+    return result
+
+
+def _scatter_class(n_points):
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
 
 # Fonction pour visualiser la distribution des vitesses de vent
+@metrics.timed("figure.plot_wind_speed_distribution")
 def plot_wind_speed_distribution(df):
     fig=go.Figure()
     fig.add_trace(
         go.Histogram(
-            x=df['wind_speed_max'],
+            x=np.asarray(df['wind_speed_max']),
             nbinsx=20,
             marker_color='blue',
             name='vitesses de vent'
@@ -24,18 +98,24 @@ def plot_wind_speed_distribution(df):
     return fig
 
 # Fonction pour visualiser le trend des vitesses de vent dans le temps
-def plot_wind_speed_over_time(df):
+@metrics.timed("figure.plot_wind_speed_over_time")
+def plot_wind_speed_over_time(df, max_points=MAX_PLOT_POINTS):
     """
-    Graphique de l'évolution temporelle des vitesses de vent avec range slider
+    Graphique de l'évolution temporelle des vitesses de vent avec range slider.
+    Les courbes sont réduites à max_points points (LTTB) avant d'être envoyées au navigateur.
     """
-    import plotly.graph_objects as go
-    
     fig = go.Figure()
+
+    # Réduction du nombre de points en préservant la forme de la courbe
+    dates, wind_speeds = _columns(df)
+    x_numeric = dates.astype('int64')
+    raw_idx = lttb_indices(x_numeric, wind_speeds, max_points)
+    Scatter = _scatter_class(len(raw_idx))
     
     fig.add_trace(
-        go.Scatter(
-            x=df['date'],
-            y=df['wind_speed_max'],
+        Scatter(
+            x=dates[raw_idx],
+            y=wind_speeds[raw_idx],
             mode='lines',
             name='Vitesse max quotidienne',
             line=dict(color='blue', width=1),
@@ -43,13 +123,14 @@ def plot_wind_speed_over_time(df):
         )
     )
     
-    # Ajouter une ligne de tendance (moyenne mobile sur 30 jours)
-    df['rolling_mean'] = df['wind_speed_max'].rolling(window=30, center=True).mean()
+    # Ajouter une ligne de tendance (moyenne mobile sur 30 jours), sans modifier les données d'entrée
+    trend = rolling_mean(wind_speeds, window=30)
+    trend_idx = lttb_indices(x_numeric, trend, max_points)
     
     fig.add_trace(
-        go.Scatter(
-            x=df['date'],
-            y=df['rolling_mean'],
+        _scatter_class(len(trend_idx))(
+            x=dates[trend_idx],
+            y=trend[trend_idx],
             mode='lines',
             name='Tendance (moyenne 30j)',
             line=dict(color='red', width=2),
@@ -76,15 +157,17 @@ def plot_wind_speed_over_time(df):
     return fig
 
 # Statistiques descriptives
+@metrics.timed("figure.get_wind_speed_stats")
 def get_wind_speed_stats(df):
     print("Statistiques descriptives des vitesses de vent :")
 
+    _, wind_speeds = _columns(df)
     stats_dict = {
         'Nombre de jours': len(df),
-        'Vitesse de vent maximale moyenne (km/h)': df['wind_speed_max'].mean(),
-        'Vitesse de vent maximale médiane (km/h)': df['wind_speed_max'].median(),
-        'Vitesse de vent minimale sur la période (km/h)': df['wind_speed_max'].min(),
-        'Vitesse de vent maximale sur la période (km/h)': df['wind_speed_max'].max()
+        'Vitesse de vent maximale moyenne (km/h)': np.nanmean(wind_speeds),
+        'Vitesse de vent maximale médiane (km/h)': np.nanmedian(wind_speeds),
+        'Vitesse de vent minimale sur la période (km/h)': np.nanmin(wind_speeds),
+        'Vitesse de vent maximale sur la période (km/h)': np.nanmax(wind_speeds)
     }
     
     df_stats = pd.DataFrame(stats_dict, index=[0])
@@ -92,14 +175,25 @@ def get_wind_speed_stats(df):
     return df_stats
 
 # Dépassement de seuils de vent
+@metrics.timed("figure.count_wind_speed_thresholds")
 def count_wind_speed_thresholds(df, thresholds):
-    count = (df['wind_speed_max'] > thresholds).sum()
+    count = (np.asarray(df['wind_speed_max']) > thresholds).sum()
     return count
 
 # Saisonnalité des vitesses de vent
+@metrics.timed("figure.wind_speed_seasonality")
 def wind_speed_seasonality(df):
-    df['month'] = pd.to_datetime(df['date']).dt.month
-    monthly_avg = df.groupby('month')['wind_speed_max'].mean().reset_index()
+    # Moyenne par mois calendaire, calculée sans ajouter de colonne aux données
+    dates, wind_speeds = _columns(df)
+    months = dates.astype('datetime64[M]').astype('int64') % 12 + 1
+    valid = ~np.isnan(wind_speeds)
+    totals = np.bincount(months[valid], weights=wind_speeds[valid], minlength=13)[1:]
+    counts = np.bincount(months[valid], minlength=13)[1:]
+    present = counts > 0
+    monthly_avg = pd.DataFrame({
+        'month': np.arange(1, 13)[present],
+        'wind_speed_max': totals[present] / counts[present]
+    })
 
     # Couleurs en fonction de la vitesse (vert = calme, rouge = venteux)
     colors = monthly_avg['wind_speed_max'].values
@@ -137,22 +231,23 @@ def wind_speed_seasonality(df):
     return fig
 
 # ==== Validation du modèle ====
-from scipy.stats import weibull_min
-import numpy as np
-from src.model_wind import fit_weibull_distribution
+from src.model_wind import get_weibull_model
 
 # Visualisation de l'ajustement de la distribution de Weibull
-def plot_weibull_fit(df):
-    shape, loc, scale = fit_weibull_distribution(df)
+@metrics.timed("figure.plot_weibull_fit")
+def plot_weibull_fit(df, model=None):
+    # Réutiliser le modèle déjà calibré s'il est fourni
+    model = model or get_weibull_model(df)
     
     # Générer des données pour la distribution de Weibull ajustée
-    x = np.linspace(0, df['wind_speed_max'].max(), 100)
-    y = weibull_min.pdf(x, shape, loc=loc, scale=scale)
+    _, wind_speeds = _columns(df)
+    x = np.linspace(0, np.nanmax(wind_speeds), 100)
+    y = model.pdf(x)
 
     fig=go.Figure()
     fig.add_trace(
         go.Histogram(
-            x=df['wind_speed_max'],
+            x=wind_speeds,
             nbinsx=20,
             marker_color='blue',
             name='Données réelles',
@@ -179,14 +274,15 @@ def plot_weibull_fit(df):
     return fig
 
 # QQ plot pour évaluer l'ajustement de la distribution de Weibull
-def plot_weibull_qq(df):
-    shape, loc, scale = fit_weibull_distribution(df)
+@metrics.timed("figure.plot_weibull_qq")
+def plot_weibull_qq(df, model=None):
+    model = model or get_weibull_model(df)
     
-    # Générer des quantiles théoriques de la distribution de Weibull
-    theoretical_quantiles = weibull_min.ppf(np.linspace(0.01, 0.99, len(df)), shape, loc=loc, scale=scale)
+    # Quantiles théoriques de la distribution de Weibull, précalculés par le modèle (nombre fixe de points)
+    theoretical_quantiles = model.theoretical_quantiles
     
-    # Quantiles empiriques
-    empirical_quantiles = np.sort(df['wind_speed_max'].values)
+    # Quantiles empiriques aux mêmes positions
+    empirical_quantiles = model.empirical_quantiles
 
     fig=go.Figure()
     fig.add_trace(